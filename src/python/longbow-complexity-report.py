@@ -78,17 +78,30 @@ def computeComplexityScore(complexity):
 	score = min(100.0 * abs(1.0 - float(complexity - 5) / 50.0), 100.0)
 	return score
 
-def csvFunctionResult(file, function):
+def functionRecord(file, function):
 	score = computeComplexityScore(function.cyclomatic_complexity)
-	string = "complexity,%s,%s,%d,%d,%.2f" % (file.filename, function.name, function.start_line, function.cyclomatic_complexity, score)
+	return LongBow.makeRecord("complexity", file.filename, "cyclomaticComplexity", function.cyclomatic_complexity, score, function.name,
+				  lineNumber=function.start_line)
 
-	LongBow.scorePrinter([90, 80], score, string)
+def fileRecord(file):
+	score = computeComplexityScore(file.average_CCN)
+	return LongBow.makeRecord("complexity", file.filename, "averageComplexity", file.average_CCN, score)
+
+def averageRecord(fileInformationList):
+	value = computeAverage(fileInformationList)
+	return LongBow.makeRecord("complexity", None, "averageComplexity", value, computeComplexityScore(value))
+
+def csvFunctionResult(file, function):
+	record = functionRecord(file, function)
+	string = "complexity,%s,%s,%d,%d,%.2f" % (record["file"], record["function"], record["lineNumber"], record["value"], record["score"])
+
+	LongBow.scorePrinter([90, 80], record["score"], string)
 	return function.cyclomatic_complexity
 
 def csvFileComplexity(file):
-	score = computeComplexityScore(file.average_CCN)
-	string = "complexity,%s,,,%.2f,%.2f" % (file.filename, file.average_CCN, score)
-	LongBow.scorePrinter([90, 80], score, string)
+	record = fileRecord(file)
+	string = "complexity,%s,,,%.2f,%.2f" % (record["file"], record["value"], record["score"])
+	LongBow.scorePrinter([90, 80], record["score"], string)
 	return
 
 def csvFunction(fileInformationList):
@@ -100,6 +113,15 @@ def csvSummary(fileInformationList):
 	map(lambda file: csvFileComplexity(file), fileInformationList)
 	return
 
+def jsonFunction(fileInformationList):
+	for fileInformation in fileInformationList:
+		LongBow.printRecords(map(lambda function: functionRecord(fileInformation, function), fileInformation))
+	return
+
+def jsonSummary(fileInformationList):
+	LongBow.printRecords(map(lambda file: fileRecord(file), fileInformationList))
+	return
+
 
 def textFunctionResult(file, function, maxFileNameLength, maxFunctionNameLength):
 	score = computeComplexityScore(function.cyclomatic_complexity)
@@ -176,7 +198,8 @@ a score ranging from 0 to 100.
 
 Input is either from a list of files supplied as command line parameters,
 or as a list of newline separated file names read from standard input.
-Output is a plain text (default) or comma-separated-value (CSV).
+Output is a plain text (default), comma-separated-value (CSV)
+or JSON, one object per line.
 
 Examples:
 
@@ -200,7 +223,7 @@ $
 	parser.add_argument('-f', '--function', default=False, action="store_true", help="print the complexity of each function in each target file.")
 	parser.add_argument('-', '--stdin', default=False, action="store_true", required=False, help="read the list of files from standard input rather than the command line.")
 	parser.add_argument('-a', '--average', default=False, action="store_true", required=False, help="display only the simple average of the average complexity of each target file.")
-	parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\" or \"csv\"")
+	parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\", \"csv\" or \"json\"")
 	parser.add_argument("files", help="Files to check", nargs="*")
 
 	args = parser.parse_args()
@@ -234,17 +257,24 @@ $
 	if args.function:
 		if args.output == "text":
 			textFunction(fileInformationList)
+		elif args.output == "json":
+			jsonFunction(fileInformationList)
 		else:
 			csvFunction(fileInformationList)
 
 	if args.summary:
 		if args.output == "text":
 			textSummary(fileInformationList)
+		elif args.output == "json":
+			jsonSummary(fileInformationList)
 		else:
 			csvSummary(fileInformationList)
 
 	if args.average:
-		print "%.2f" % computeAverage(fileInformationList)
+		if args.output == "json":
+			LongBow.printRecords([averageRecord(fileInformationList)])
+		else:
+			LongBow.getReportSink().printLine("%.2f" % computeAverage(fileInformationList))
 
 if __name__ == "__main__":
 	'''
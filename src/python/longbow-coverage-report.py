@@ -79,8 +79,8 @@ Report on the code coverage of tests.
 The source files or executables to analyse are supplied as command line parameters,
 or as a list of newline separated file names read from standard input.
 
-Output is plain-text (default --output text) or a CSV file (--output csv)
-reporting the results.
+Output is plain-text (default --output text), a CSV file (--output csv)
+or JSON, one object per line (--output json), reporting the results.
 
 Results are:
   An average of all files specified (--average)
@@ -97,7 +97,7 @@ Results are:
     parser.add_argument('-a', '--average', default=False, action="store_true", required=False,
                         help="Display the average score for all C source files (excluding test source files).")
     parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str,
-                        help="Set the output format: \"text\" or \"csv\"")
+                        help="Set the output format: \"text\", \"csv\" or \"json\"")
     parser.add_argument('-v', '--visual', default=False, action="store_true", required=False,
                         help="Colorize the original source code showing coverage")
     parser.add_argument('-x', '--explain', default=False, action="store_true", required=False,
@@ -106,6 +106,17 @@ Results are:
                         help="A list containing the score distributions for pretty-printing. Default [95, 90]")
     parser.add_argument('-T', '--includeTestSources', default=False, action="store_true", required=False,
                         help="Include analysis of the test sources. Default False")
+    parser.add_argument('-j', '--jobs', default=1, action="store", required=False, type=int,
+                        help="The number of gcov processes to run concurrently. Default 1.")
+    parser.add_argument('-B', '--backend', default="text", action="store", required=False, type=str, choices=["text", "json", "native"],
+                        help="How coverage is read: \"text\" parses gcov's output and .gcov files, "
+                             "\"json\" decodes gcov's JSON intermediate format (GNU gcov 10 or later), "
+                             "\"native\" reads the .gcno and .gcda files without running gcov (GCC 12 or later). Default text.")
+    parser.add_argument('--artifact-index', dest="artifactIndex", default="", action="store", required=False, type=str,
+                        help="A file in which to keep the index of the object and coverage files of the build tree between invocations.")
+    parser.add_argument('--store', default="", action="store", required=False, type=str,
+                        help="An SQLite database in which to keep the coverage of each test executable between invocations. "
+                             "Coverage is only computed again for test executables whose .gcda or .gcno file has changed.")
     parser.add_argument('-t', '--testDir', default="", action="store", required=False, type=str,
                         help="Directory hint for locating test files.")
 
@@ -109,7 +109,7 @@ Finegrain Output (--finegrain):
     parser.add_argument('-a', '--average', default=False, action="store_true", help="Print an average summary of the naming conformance results for all modules")
     parser.add_argument('-s', '--summary', default=False, action="store_true", help="Print a summary of the naming conformance results for each module")
     parser.add_argument('-f', '--finegrain', default=False, action="store_true", help="Print the individual results for each function, typedef, and enumeration in each module.")
-    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\" or \"csv\"")
+    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\", \"csv\" or \"json\"")
     parser.add_argument('-d', '--distribution', default="[99, 90]", action="store", required=False, type=str, help="a list containing the score distributions for pretty-printing. Default [99, 90]")
     parser.add_argument('-t', '--trace', default=False, action="store_true", help="Turn on exception tracing to debug an issue with the tool.")
     parser.add_argument('-', '--stdin', default=False, action="store_true", required=False, help="Read the list of files from standard input.")
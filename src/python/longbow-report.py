@@ -0,0 +1,148 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+import sys
+import argparse
+
+sys.path.append("@INSTALL_PYTHON_DIR@")
+sys.path.append("@DEPENDENCY_PYTHON_DIR@")
+sys.path.append("../site-packages/longbow/")
+import Scorecard
+
+
+if __name__ == '__main__':
+    '''
+@(#) longbow-report @VERSION@ @DATE@
+@(#)   Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).
+@(#)   All Rights Reserved. Use is subject to license terms.
+'''
+    description = '''
+longbow-report @VERSION@ @DATE@
+Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).
+All Rights Reserved. Use is subject to license terms.
+
+Grade C source and header files with all of the LongBow reports at once,
+and display a scorecard of the score each report gave each file.
+
+The files to grade are supplied as command line parameters,
+or as a list of newline separated file names read from standard input.
+A directory is searched for the .c and .h files beneath it.
+Each directory is walked once, and each file is read once, however many reports examine it.
+
+The reports (--graders) are:
+  style          Conformance to the uncrustify style (see longbow-style-report)
+  name           Conformance to the naming conventions (see longbow-name-report)
+  coverage       Code coverage of the tests (see longbow-coverage-report)
+  documentation  Documentation warnings in a doxygen log, given --doxygenlog (see longbow-doxygen-report)
+  vocabulary     Number of tokens in each function, if HFCCA is installed (see longbow-vocabulary-report)
+
+Output is plain-text (default --output text) with one line per file and one column per report,
+a CSV file (--output csv) of the same,
+or every measurement made by every report as JSON, one object per line (--output json).
+
+Example:
+
+% longbow-report -j 8 -p ../build/libparc/parc/algol parc/algol
+    '''
+    parser = argparse.ArgumentParser(prog='longbow-report',
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     description=description)
+    parser.add_argument('-', '--stdin', default=False, action="store_true", required=False,
+                        help="Read the list of files from standard input.")
+    parser.add_argument('-g', '--graders', default=",".join(Scorecard.GRADERS), action="store", required=False, type=str,
+                        help="A comma separated list of the reports to run. Default " + ",".join(Scorecard.GRADERS))
+    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str,
+                        help="Set the output format: \"text\", \"csv\" or \"json\"")
+    parser.add_argument('-d', '--distribution', default="[99, 90]", action="store", required=False, type=str,
+                        help="A list containing the score distributions for pretty-printing. Default [99, 90]")
+    parser.add_argument('-j', '--jobs', default=1, action="store", required=False, type=int,
+                        help="The number of files to check for style, and gcov processes to run, concurrently. Default 1.")
+    parser.add_argument('-b', '--batch', default=0, action="store", required=False, type=int,
+                        help="The maximum number of files formatted by each invocation of uncrustify. Default 0, one invocation per file.")
+    parser.add_argument('-p', '--opath', default="", action="store", required=False, type=str,
+                        help="The path for object files, which can be a path to a static library.")
+    parser.add_argument('-t', '--testDir', default="", action="store", required=False, type=str,
+                        help="Directory hint for locating test files.")
+    parser.add_argument('-l', '--doxygenlog', default="", action="store", required=False, type=str,
+                        help="The doxygen output log to grade documentation from.")
+    parser.add_argument('-B', '--backend', default="text", action="store", required=False, type=str, choices=["text", "json", "native"],
+                        help="How coverage is read (see longbow-coverage-report). Default text.")
+    parser.add_argument('--artifact-index', dest="artifactIndex", default="", action="store", required=False, type=str,
+                        help="A file in which to keep the index of the object and coverage files of the build tree between invocations.")
+    parser.add_argument('--store', default="", action="store", required=False, type=str,
+                        help="An SQLite database in which to keep the coverage of each test executable between invocations.")
+    parser.add_argument('--trace', default=False, action="store_true",
+                        help="Display the traceback of a report that fails.")
+    parser.add_argument("files", help="Files or directories to grade", nargs="*")
+
+    parser.set_defaults(exemplarCommand="@UNCRUSTIFY_BIN@", exemplarConfig="@UNCRUSTIFY_CONFIG@")
+
+    args = parser.parse_args()
+
+    roots = []
+    if args.stdin:
+        for line in sys.stdin:
+            t = line.strip()
+            if len(t) > 0:
+                roots.append(t)
+    else:
+        roots = args.files
+
+    if len(roots) == 0:
+        parser.print_usage()
+        sys.exit(1)
+
+    Scorecard.commandLineMain(args, roots)
@@ -67,7 +67,7 @@ from pprint import pprint
 
 def textOutputFile(file, maximumFileNameLength):
     format = "%-" + str(maximumFileNameLength) + "s %6d"
-    print format % (file[0], file[1])
+    LongBow.getReportSink().printLine(format % (file[0], file[1]))
     return
 
 def textSummary(files):
@@ -77,21 +77,30 @@ def textSummary(files):
 
 def csvOutputFile(file):
     format = "size,%s,%d"
-    print format % (file[0], file[1])
+    LongBow.getReportSink().printLine(format % (file[0], file[1]))
     return
 
 def csvSummary(files):
     map(lambda file: csvOutputFile(file), files)
     return
 
+def jsonSummary(files):
+    LongBow.printRecords(map(lambda file: LongBow.makeRecord("size", file[0], "lines", file[1]), files))
+    return
+
+def jsonTotal(files):
+    total = sum(map(lambda file: file[1], files))
+    LongBow.printRecords([LongBow.makeRecord("size", None, "lines", total)])
+    return
+
 def textTotal(files):
     total = sum(map(lambda file: file[1], files))
-    print total
+    LongBow.getReportSink().printLine(str(total))
     return
 
 def csvTotal(files):
     total = sum(map(lambda file: file[1], files))
-    print total
+    LongBow.getReportSink().printLine(str(total))
     return
 
 def main():
@@ -125,7 +134,7 @@ $
     parser.add_argument('-', '--stdin', default=False, action="store_true", required=False, help="read the list of files from standard input.")
     parser.add_argument('-s', '--summary', default=False, action="store_true", required=False, help="display the number of lines for each file")
     parser.add_argument('-t', '--total', default=False, action="store_true", required=False, help="display the total number of lines for all files")
-    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\" or \"csv\"")
+    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\", \"csv\" or \"json\"")
 
     parser.add_argument("files", help="Files to check", nargs="*")
 
@@ -154,12 +163,16 @@ $
     if args.summary:
         if args.output == "text":
             textSummary(files)
+        elif args.output == "json":
+            jsonSummary(files)
         else:
             csvSummary(files)
 
     if args.total:
         if args.output == "text":
             textTotal(files)
+        elif args.output == "json":
+            jsonTotal(files)
         else:
             csvTotal(files)
 
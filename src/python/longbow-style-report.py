@@ -85,6 +85,16 @@ For each of these reports, the output format is specified by:
 --output csv Display a list of comma-separated values on standard output.
 --output gui Use a graphical user interface if possible.
 
+Files are checked one at a time unless --jobs N is specified,
+in which case N files are checked in parallel.
+The results are identical either way.
+With --batch N each invocation of uncrustify formats up to N files,
+amortizing the cost of starting uncrustify and reading its configuration.
+
+With --cache DIR the exemplar of each file is remembered in DIR,
+keyed by the content of the file, the uncrustify configuration and the uncrustify version,
+so unchanged files are not reformatted on the next run.
+
 The visual report displays either a colorized, line by line output of
 the differences between the original source file it's exemplar (-o text),
 or displays a file-merge application for interactive use ()-o gui)
@@ -112,9 +122,13 @@ $
     parser.add_argument('-a', '--average', default=False, action="store_true", required=False, help="Display the simple average of all scores.")
     parser.add_argument('-t', '--total', default=False, action="store_true", required=False, help="Display the percentage of all compliant lines to the total number of lines in all files.")
     parser.add_argument('-d', '--distribution', default="[95, 90]", action="store", required=False, type=str, help="a list containing the score distributions for pretty-printing. Default '[95, 90]' (green >= 95, yellow >= 90, red < 90).")
-    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: 'text', 'csv', or 'gui'.")
+    parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: 'text', 'csv', 'json', or 'gui'.")
     parser.add_argument('-v', '--visual', default=False, action="store_true", required=False, help="Display a visual representation of the style check.")
     parser.add_argument('-k', '--key', default="name", action="store", required=False, type=str, help="The sort key: Type '--key help' for the list.")
+    parser.add_argument('-j', '--jobs', default=1, action="store", required=False, type=int, help="The number of files to check in parallel. Default 1.")
+    parser.add_argument('-b', '--batch', default=0, action="store", required=False, type=int, help="The maximum number of files formatted by each invocation of uncrustify. Default 0, one invocation per file.")
+    parser.add_argument('-c', '--cache', default="", action="store", required=False, type=str, help="A directory in which to cache exemplars between invocations.")
+    parser.add_argument('--cache-size', dest="cacheSize", default=256, action="store", required=False, type=int, help="The maximum size of the exemplar cache in megabytes. Default 256.")
     parser.add_argument('-e', '--exclude', default="", action="store", required=False, type=str, help="Exclude a comma separated set of one or more of: 'red', 'yellow', 'green'.")
 
     parser.add_argument("files", help="Files to check", nargs="*")
@@ -56,157 +56,174 @@
 # @copyright (c) 2014-2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
 import os
 import sys
-import re
-import pprint
-import subprocess
 import argparse
 import json
 
-class TokenParser:
-    def __init__(self, tokens=[]):
-        self.index = 0
-        self.tokens = tokens
-
-    def nextToken(self):
-        result = self.tokens[self.index]
-        self.index = self.index + 1
-        return result
-
-    def previousToken(self):
-        self.index = self.index - 1
-        result = self.tokens[self.index - 1]
-        return result
-
-    def expectedToken(self, expected):
-        token = self.nextToken()
-        if token == expected:
-            return True
-        self.index = self.index - 1
-        print "expectedToken(%s) is not the actual %s" % (expected, token)
-        return False
-
-    def end(self):
-        if self.index == len(self.tokens):
-            return True
-        return False
-
-class LongBowCodeCoverage:
-    def __init__(self):
-        return
-
-    def run(self, executableFile):
-        lines = subprocess.check_output([ "gcov", "-f", executableFile ])
-        token =  map(lambda x : x.strip("'"), re.split("[ :\n]+", lines))
-        return self.parse(token)
-
-    def parseFunction(self, parser):
-        functionName = parser.nextToken()
-        parser.expectedToken("Lines")
-        parser.expectedToken("executed")
-        coverage = parser.nextToken()
-        return { "function" : functionName, "coverage" : coverage }
-   
-    def parseFile(self, parser):
-        fileName = parser.nextToken()
-        parser.expectedToken("Lines")
-        parser.expectedToken("executed")
-        coverage = parser.nextToken()
-        return { "file" : fileName, "coverage" : coverage }
-   
-    def parse(self, tokens):
-        parser = TokenParser(tokens)
-        functions = [ ]
-       
-        while not parser.end():
-            token = parser.nextToken()
-            if (token == "Function"):
-                function = self.parseFunction(parser)
-                functions.append(function)
-            elif (token == "File"):
-                file = self.parseFile(parser)
-            pass
-
-        self.detailCoverage = { "file" : file, "functions" : functions }
-        return self.detailCoverage
-
-    def getCoverage(self):
-        result["file"]["coverage"]
-
-    def getDetailCoverage(self):
-        return self.detailCoverage
+sys.path.append("@INSTALL_PYTHON_DIR@")
+sys.path.append("@DEPENDENCY_PYTHON_DIR@")
+sys.path.append("../site-packages/longbow/")
+import TestHistory
+import TestResults
+import GCov
+import Language_C
 
 
 class LongBowTestRun:
     def __init__(self, options=[]):
         self.options = options
-        self.mainFileName = None
-        self.exitStatus = 0
+        self.results = []
+        self.writers = []
         return
-   
+
     def setOptions(self, options=[]):
         self.options = options
         return
-   
-    def getMainFileName(self):
-        return self.mainFileName
-   
-    def run(self, testRunner):
-        self.mainFileName = testRunner
-        self.exitStatus = 0
-
-        try:
+
+    def setResultWriters(self, writers=[]):
+        '''
+        Set the writers (see TestResults.openResultWriters) to which each result is added as its test runner finishes.
+        '''
+        self.writers = writers
+        return
+
+    def getResults(self):
+        return self.results
+
+    def getSlowestTestCases(self, count):
+        return TestResults.getSlowestTestCases(self.results, count)
+
+    def run(self, testRunner, removeCoverage=False, reportItem=None):
+        '''
+        Run the test runner, collecting the status and timing of each test case from its output as it is written,
+        and return its exit status.
+        If removeCoverage is True, the coverage recorded by previous runs of the test runner is removed first.
+        '''
+        if removeCoverage:
             try:
                 os.remove(testRunner + ".gcda")
-            except:
+            except OSError:
                 pass
-            lines = subprocess.check_output([ testRunner ])
-            lines = re.split("[ :]+", lines)
-            self.exitStatus = 0
-        except subprocess.CalledProcessError, e:
-            self.exitStatus = e.returncode
-       
-        return self.exitStatus
-
-    def report(self, detailedOutput=False, jsonOutput=False):
-        result = ""
-        if self.exitStatus == 0:
-            coverage = LongBowCodeCoverage()
-            result = coverage.run(testRunner.getMainFileName())
-   
-            if detailedOutput:
-                if jsonOutput:
-                    result = json.dumps(result, sort_keys=False, indent=4, separators=(',', ': '))
-                else:
-                    pp = str(result)
-                    pass
-            else:
-                if jsonOutput:
-                    result = json.dumps(result["file"], sort_keys=False, indent=4, separators=(',', ': '))
-                else:
-                    result = "PASS " + result["file"]["file"] + " " + result["file"]["coverage"]
-        else:
-            result = "FAIL " + args.testRunner
-            pass
 
+        result = TestResults.runTestRunner(testRunner, self.options, reportItem=reportItem)
+        self.results.append(result)
+        for writer in self.writers:
+            writer.add(result)
+        return result.exitStatus
+
+    def computeCoverage(self, jobs=1, backend="text"):
+        '''
+        Compute the coverage of the module tested by each successful test runner, in one batch after all of them have run,
+        returning a dictionary mapping each test runner to the tuple (tested file, coverage), or None if there is none.
+        '''
+        testRunners = map(lambda result: result.testRunner, filter(lambda result: result.isSuccessful(), self.results))
+        testRunners = filter(lambda testRunner: GCov.findGCovFiles(os.path.abspath(testRunner)) is not None, testRunners)
+        coverages = GCov.getCoverages(map(lambda testRunner: os.path.abspath(testRunner), testRunners), jobs, backend)
+
+        result = { }
+        for (testRunner, coverage) in zip(testRunners, coverages):
+            result[testRunner] = None
+            if coverage is None:
+                continue
+            sourceName = Language_C.Module(testRunner).getCSourceName()
+            for document in coverage.values():
+                for testedFile in document["testedFiles"]:
+                    if os.path.basename(testedFile) == sourceName:
+                        result[testRunner] = (testedFile, document["testedFiles"][testedFile]["coverage"])
         return result
 
+    def report(self, result, detailedOutput=False, jsonOutput=False, coverage=None):
+        if jsonOutput:
+            document = result.toDictionary()
+            if not detailedOutput:
+                del document["testCases"]
+            if coverage is not None:
+                document["coverage"] = { "file" : coverage[0], "coverage" : coverage[1] }
+            return json.dumps(document, sort_keys=False, indent=4, separators=(',', ': '))
+
+        if result.isSuccessful():
+            lines = [ "PASS %s %d test cases %.2fs" % (result.testRunner, len(result.testCases), result.elapsed) ]
+        else:
+            lines = [ "FAIL %s %d test cases %.2fs exit status %d" % (result.testRunner, len(result.testCases), result.elapsed, result.exitStatus) ]
+
+        if detailedOutput:
+            testCases = result.testCases
+        else:
+            testCases = result.getFailedTestCases()
+        for testCase in testCases:
+            lines.append("     %s/%s %.6fs %s" % (testCase["fixture"], testCase["testCase"], testCase["elapsed"], testCase["status"]))
+
+        if coverage is not None:
+            lines.append("     coverage %s %.2f" % coverage)
+        return "\n".join(lines)
+
 
 if __name__ == '__main__':
-    testRunners = []
-    if len(sys.argv) < 2:
-        print "Usage: longbow-test-run.py testExecutable"
-        print "Run a LongBow test"
-        sys.exit(1)
-   
-    parser = argparse.ArgumentParser(description='Run a LongBow Test')
-    parser.add_argument("--json", help="Produce JSON output instead of a Python dictionary.",  action="store_true")
-    parser.add_argument("--detailed", help="Produce detailed output.",  action="store_true")
+    parser = argparse.ArgumentParser(prog='longbow-test-run', formatter_class=argparse.RawDescriptionHelpFormatter, description='''
+Run one or more LongBow test runners, reporting the status of each and of each of its failed test cases.
+
+The status and timing of each test case is read from the report the test runner writes as it runs.
+With --coverage, the coverage of the module tested by each successful test runner is computed
+after all of them have run, in one batch of up to --jobs concurrent gcov processes.
+
+With --history, the elapsed time of each fixture and test case is kept in the given file between invocations,
+and those that took more than --regression-factor times the mean of their previous runs are listed.
+--slowest N lists the N slowest test cases.
+''')
+    parser.add_argument("--json", help="Produce JSON output instead of text.",  action="store_true")
+    parser.add_argument("--detailed", help="Produce detailed output: every test case rather than only those that failed.",  action="store_true")
+    parser.add_argument("--coverage", help="Report the coverage of the module tested by each successful test runner.",  action="store_true")
+    parser.add_argument('-j', '--jobs', default=1, action="store", required=False, type=int,
+                        help="The number of gcov processes to run concurrently for --coverage. Default 1.")
+    parser.add_argument('-B', '--backend', default="text", action="store", required=False, type=str, choices=["text", "json", "native"],
+                        help="How coverage is read (see longbow-coverage-report). Default text.")
+    parser.add_argument('--history', default="", action="store", required=False, type=str,
+                        help="A file in which to keep the elapsed time of each fixture and test case between invocations.")
+    parser.add_argument('--slowest', default=0, action="store", required=False, type=int,
+                        help="List the given number of slowest test cases. Default 0, none.")
+    parser.add_argument('--regression-factor', dest="regressionFactor", default=TestHistory.DEFAULT_REGRESSION_FACTOR, action="store", required=False, type=float,
+                        help="With --history, list the fixtures and test cases that took this many times the mean of their previous runs. Default %.1f." % TestHistory.DEFAULT_REGRESSION_FACTOR)
+    parser.add_argument('--junit-xml', dest="junitXml", default="", action="store", required=False, type=str,
+                        help="A JUnit XML file to which to write the results, rewritten as each test runner finishes.")
+    parser.add_argument('--json-lines', dest="jsonLines", default="", action="store", required=False, type=str,
+                        help="A file to which to write the results as JSON, one test runner per line, as each finishes.")
     parser.add_argument("testRunner", help="The name of the test executable.", nargs='+')
     args = parser.parse_args()
 
-    testRunner = LongBowTestRun([ "--run-nonforked" ])
+    testRun = LongBowTestRun([ "--run-nonforked" ])
+    testRun.setResultWriters(TestResults.openResultWriters(args.junitXml, args.jsonLines))
 
+    exitStatus = 0
     for test in args.testRunner:
-        exitStatus = testRunner.run(test)
-        print testRunner.report(args.detailed, args.json)
-
+        status = testRun.run(test, args.coverage)
+        if exitStatus == 0:
+            exitStatus = status
+        if not args.coverage:
+            print testRun.report(testRun.getResults()[-1], args.detailed, args.json)
+            sys.stdout.flush()
+
+    for writer in testRun.writers:
+        writer.close()
+
+    if args.coverage:
+        coverages = testRun.computeCoverage(args.jobs, args.backend)
+        for result in testRun.getResults():
+            print testRun.report(result, args.detailed, args.json, coverages.get(result.testRunner))
+
+    regressions = []
+    if args.history:
+        history = TestHistory.TestHistory(args.history)
+        regressions = TestResults.recordDurations(testRun.getResults(), history, args.regressionFactor)
+        history.save()
+
+    if args.json:
+        if args.slowest > 0 or len(regressions) > 0:
+            document = { "slowestTestCases" : testRun.getSlowestTestCases(args.slowest),
+                         "regressions" : map(lambda (name, elapsed, expected): { "name" : name, "elapsed" : elapsed, "expected" : expected }, regressions) }
+            print json.dumps(document, sort_keys=False, indent=4, separators=(',', ': '))
+    else:
+        if args.slowest > 0:
+            print "\n".join(TestResults.formatSlowestTestCases(testRun.getResults(), args.slowest))
+        for line in TestResults.formatRegressions(regressions):
+            print line
+
+    sys.exit(exitStatus)
@@ -54,42 +54,436 @@
 #
 # @author Glenn Scott, Palo Alto Research Center (PARC)
 # @copyright (c) 2013-2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+import os
 import sys
-from subprocess import call
+import time
+import json
+import argparse
+import subprocess
+
+sys.path.append("@INSTALL_PYTHON_DIR@")
+sys.path.append("../site-packages/longbow/")
+import TestHistory
+import TestResults
+import TestSelection
+
+# The exit status given to a test runner that is stopped for running longer than the timeout, as timeout(1) does.
+TIMEOUT_STATUS = 124
+
+# The exit status given to a test runner that could not be started, as the shell does.
+NOT_STARTED_STATUS = 127
+
+# How often, in seconds, the running test runners are checked for completion.
+POLL_INTERVAL = 0.02
+
+def getStatusText(status, timedOut=False, skipped=False):
+    if skipped:
+        return "Skipped"
+    elif timedOut:
+        return "Timed out"
+    elif status == 0:
+        return "Passed"
+    elif status < 0:
+        return "Signaled %d" % -status
+    return "Failed %d" % status
+
+def getSuiteStatus(statuses):
+    '''
+    Return the first of the exit statuses of the test runners, in the order they were given, that is not 0, or 0.
+    '''
+    for status in statuses:
+        if status != 0:
+            return status
+    return 0
+
+def printStatusLine(count, total, statusText, elapsed, test):
+    width = len(str(total))
+    sys.stdout.write("[%*d/%d] %-10s %8.2fs %s\n" % (width, count, total, statusText, elapsed, test))
+    sys.stdout.flush()
+    return
+
+class TestRun:
+    '''
+    A test runner started by LongBowTestSuite, writing its output to <test>.log.
+    '''
+    def __init__(self, order, test, options):
+        self.order = order
+        self.test = test
+        self.command = [ test ] + options
+        self.status = None
+        self.timedOut = False
+        self.elapsed = 0.0
+        self.outputFile = open(test + ".log", 'w')
+        self.startTime = time.time()
+        try:
+            self.process = subprocess.Popen(self.command, stdout=self.outputFile)
+        except OSError, e:
+            self.outputFile.write("%s: %s\n" % (test, e))
+            self.process = None
+        return
+
+    def poll(self, timeout=0):
+        '''
+        Return True if the test runner has finished,
+        first stopping it if it has run for longer than timeout seconds (0 for no limit).
+        '''
+        if self.process is None:
+            status = NOT_STARTED_STATUS
+        else:
+            status = self.process.poll()
+            if status is None:
+                if timeout <= 0 or time.time() - self.startTime <= timeout:
+                    return False
+                self.process.kill()
+                self.process.wait()
+                self.timedOut = True
+                status = TIMEOUT_STATUS
+
+        self.status = status
+        self.elapsed = time.time() - self.startTime
+        self.outputFile.close()
+        return True
+
+    def getStatusText(self):
+        return getStatusText(self.status, self.timedOut)
+
+    def getResult(self):
+        return { "order" : self.order, "test" : self.test, "status" : self.status, "elapsed" : self.elapsed, "timedOut" : self.timedOut }
+
 
 class LongBowTestSuite:
     def __init__(self):
         self.options = []
+        self.jobs = 1
+        self.timeout = 0
+        self.history = None
+        self.testSelection = None
+        self.skipped = []
+        self.writers = []
+        self.testRuns = []
+        self.testRunnerResults = []
         return
 
     def setOptions(self, options=[]):
         self.options = options
         return
 
-    def run(self, testRunners=[]):
-        result = 0
-        for test in testRunners:
-            outputFileName = test + ".log"
-            outputFile = open(outputFileName, 'w')
-            command = [ test ] + self.options
-            print command
-            status = call(command, stdout=outputFile)
-            if result == 0:
-                result = status
-                pass
-            outputFile.close()
-            pass
-        return result
+    def setJobs(self, jobs=1):
+        self.jobs = max(1, jobs)
+        return
+
+    def setTimeout(self, timeout=0):
+        self.timeout = timeout
+        return
+
+    def setHistory(self, history=None):
+        '''
+        Set the TestHistory in which the duration of each test runner is recorded and by which they are ordered.
+        The durations of their fixtures and test cases are recorded in it by recordDurations.
+        '''
+        self.history = history
+        return
+
+    def setTestSelection(self, testSelection=None):
+        '''
+        Set the TestSelection in which the exit status and dependencies of each test runner are recorded and by which they are selected.
+        '''
+        self.testSelection = testSelection
+        return
+
+    def setResultWriters(self, writers=[]):
+        '''
+        Set the writers (see TestResults.openResultWriters) to which the results of each test runner are added as it finishes.
+        '''
+        self.writers = writers
+        return
+
+    def getTestRunnerResult(self, testRun):
+        '''
+        Collect the results of the test runner's test cases from its log.
+        '''
+        return TestResults.readLogFile(testRun.test, testRun.test + ".log").finish(testRun.status, testRun.elapsed, testRun.timedOut)
+
+    def getHistoryName(self, test):
+        '''
+        The name of the test runner in the history: its name as given, not its absolute path,
+        so machines with the workspace at different paths share durations and compute the same shards.
+        '''
+        return os.path.normpath(test)
+
+    def schedule(self, testRunners):
+        '''
+        Return the positions of the test runners in the order they are to be started.
+        With a history, the longest running are started first, so that no long test runner is left running alone at the end.
+        '''
+        if self.history is None:
+            return range(len(testRunners))
+        return TestHistory.orderLongestFirst(map(self.getHistoryName, testRunners), self.history)
+
+    def shard(self, testRunners, shard, count, history=None):
+        '''
+        Return the positions of the test runners in shard number shard (0 to count - 1) of count shards.
+        The shards are balanced by the durations in the given history, or else the suite's history, if there is one.
+        Every shard must be computed from the same durations, or some test runners will be run by two shards and others by none.
+        '''
+        if history is None:
+            history = self.history
+        expectedDurations = [ None ] * len(testRunners)
+        if history is not None:
+            expectedDurations = map(lambda test: history.getExpectedDuration(self.getHistoryName(test)), testRunners)
+        shards = TestHistory.assignShards(map(self.getHistoryName, testRunners), expectedDurations, count)
+        return filter(lambda position: shards[position] == shard, range(len(testRunners)))
+
+    def select(self, testRunners, selection=None, changed=False):
+        '''
+        Return the positions of the test runners, of those at the positions in selection if it is not None,
+        that failed when they last ran or had not run before, and if changed is True also those that have changed since.
+        The others are recorded as skipped, for writeResult.
+        '''
+        if selection is None:
+            selection = range(len(testRunners))
+        if changed:
+            selected = filter(lambda position: self.testSelection.hasFailed(testRunners[position]) or self.testSelection.isChanged(testRunners[position]), selection)
+        else:
+            selected = filter(lambda position: self.testSelection.hasFailed(testRunners[position]), selection)
+        self.skipped = map(lambda position: (position, testRunners[position]), filter(lambda position: position not in selected, selection))
+        return selected
+
+    def reportFinished(self, testRun, finished, total):
+        printStatusLine(finished, total, testRun.getStatusText(), testRun.elapsed, testRun.test)
+        return
+
+    def run(self, testRunners=[], selection=None):
+        '''
+        Run each test runner, up to jobs of them at a time, each for no longer than timeout seconds (0 for no limit).
+        If selection is not None, only the test runners at the positions it lists are run.
+        A status line is displayed as each one finishes.
+        The test runners are started in the order given by schedule.
+        Return the exit status of the first test runner, in the order given, that did not exit with 0, or 0.
+        '''
+        if selection is None:
+            selection = range(len(testRunners))
+        scheduled = self.schedule(map(lambda position: testRunners[position], selection))
+        pending = map(lambda position: selection[position], scheduled)
+        total = len(pending)
+        self.testRuns = []
+        self.testRunnerResults = []
+        running = []
+        while len(pending) > 0 or len(running) > 0:
+            while len(pending) > 0 and len(running) < self.jobs:
+                order = pending.pop(0)
+                running.append(TestRun(order, testRunners[order], self.options))
+
+            finished = filter(lambda testRun: testRun.poll(self.timeout), running)
+            for testRun in finished:
+                running.remove(testRun)
+                self.testRuns.append(testRun)
+                if self.history is not None and testRun.process is not None:
+                    self.history.put(self.getHistoryName(testRun.test), testRun.elapsed)
+                if self.testSelection is not None:
+                    self.testSelection.put(testRun.test, testRun.status)
+                self.reportFinished(testRun, len(self.testRuns), total)
+                testRunnerResult = self.getTestRunnerResult(testRun)
+                self.testRunnerResults.append(testRunnerResult)
+                for writer in self.writers:
+                    writer.add(testRunnerResult)
+
+            if len(finished) == 0:
+                time.sleep(POLL_INTERVAL)
+
+        return getSuiteStatus(map(lambda testRun: testRun.status, sorted(self.testRuns, key=lambda testRun: testRun.order)))
+
+    def recordDurations(self, factor=TestHistory.DEFAULT_REGRESSION_FACTOR):
+        '''
+        Record the durations of the fixtures and test cases of the last run in the history,
+        returning those that were slower than in previous runs (see TestResults.recordDurations).
+        '''
+        return TestResults.recordDurations(self.testRunnerResults, self.history, factor)
+
+    def writeResult(self, fileName, total, shard=None):
+        '''
+        Write the results of the last run to the named file as JSON, for longbow-test-suite merge.
+        The test runners that select skipped are written as skipped, with the exit status of their last run.
+        '''
+        testRunners = map(lambda testRun: testRun.getResult(), self.testRuns)
+        for (order, test) in self.skipped:
+            testRunners.append({ "order" : order, "test" : test, "status" : self.testSelection.getStatus(test),
+                                 "elapsed" : 0.0, "timedOut" : False, "skipped" : True })
+        testRunners = sorted(testRunners, key=lambda testRunner: testRunner["order"])
+        result = { "shard" : shard, "total" : total,
+                   "status" : getSuiteStatus(map(lambda testRunner: testRunner["status"], testRunners)),
+                   "testRunners" : testRunners }
+        with open(fileName, "w") as output:
+            json.dump(result, output, indent=1, sort_keys=True)
+        return
+
+
+def parseShard(value):
+    '''
+    Parse a shard specification i/N, where 1 <= i <= N, returning the tuple (i, N).
+    '''
+    try:
+        (shard, count) = map(int, value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("%s is not of the form i/N" % value)
+    if count < 1 or shard < 1 or shard > count:
+        raise argparse.ArgumentTypeError("%s is not a shard i/N where 1 <= i <= N" % value)
+    return (shard, count)
+
+
+def mergeResults(results):
+    '''
+    Combine the results written by the shards of a suite, returning the tuple (test runner results in order, total),
+    or raising ValueError if the results are not of the same suite or some test runners are missing.
+    '''
+    if len(results) == 0:
+        raise ValueError("No results to merge")
+
+    total = results[0]["total"]
+    testRunners = { }
+    for result in results:
+        if result["total"] != total:
+            raise ValueError("The results are of suites of %d and %d test runners" % (total, result["total"]))
+        for testRunner in result["testRunners"]:
+            testRunners[testRunner["order"]] = testRunner
+
+    if len(testRunners) != total:
+        raise ValueError("Missing the results of %d of %d test runners" % (total - len(testRunners), total))
+
+    return (map(lambda order: testRunners[order], range(total)), total)
+
+
+def mergeMain(argv):
+    parser = argparse.ArgumentParser(prog='longbow-test-suite merge', description="Combine the results of the shards of a suite (--result) into one, exiting with the status of the whole suite.")
+    parser.add_argument('--result', default="", action="store", required=False, type=str,
+                        help="A file to which to write the combined result.")
+    parser.add_argument("results", metavar="resultFile", help="Result files written by longbow-test-suite --result", nargs="+")
+
+    args = parser.parse_args(argv)
+
+    results = []
+    for fileName in args.results:
+        with open(fileName, "r") as file:
+            results.append(json.load(file))
+
+    try:
+        (testRunners, total) = mergeResults(results)
+    except ValueError, e:
+        print >> sys.stderr, "longbow-test-suite merge: %s" % e
+        return 1
+
+    for (count, testRunner) in zip(range(1, total + 1), testRunners):
+        printStatusLine(count, total, getStatusText(testRunner["status"], testRunner["timedOut"], testRunner.get("skipped", False)), testRunner["elapsed"], testRunner["test"])
+
+    status = getSuiteStatus(map(lambda testRunner: testRunner["status"], testRunners))
+    if args.result:
+        with open(args.result, "w") as output:
+            json.dump({ "shard" : None, "total" : total, "status" : status, "testRunners" : testRunners }, output, indent=1, sort_keys=True)
+    return status
 
 
 if __name__ == '__main__':
-    testRunners = []
-    if len(sys.argv) < 2:
-        print "Usage: longbow-test-suite.py testExecutable ..."
-        print "Run one or more LongBow test runners as indpendant processes"
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        sys.exit(mergeMain(sys.argv[2:]))
+
+    description = '''
+Run one or more LongBow test runners as independent processes, writing the output of each to <testExecutable>.log.
+
+With --shard i/N only the i-th of N shards of the test runners is run,
+so a suite can be divided among N machines each given the same list of test runners.
+The shards are balanced by the durations in the --shard-history file, or else the --history file, if it has them.
+Every shard must read the same durations: a --history file that each shard saves to,
+and that the shards run one after another share, changes between them, so give them a --shard-history
+file that none of them writes, such as a copy of the history taken before any shard starts.
+Each shard writes its results with --result FILE, and
+
+  longbow-test-suite merge FILE...
+
+combines them, displaying the status of each test runner and exiting with the status of the whole suite.
+
+The elapsed time of each fixture and test case is taken from the report of its test runner.
+With --history they are kept along with the durations of the test runners,
+and those that took more than --regression-factor times the mean of their previous runs are listed.
+--slowest N lists the N slowest test cases.
+
+With --state, the exit status of each test runner and the content hashes of it and the shared libraries it links with
+(those beneath the --library-dir directories that define the symbols it leaves undefined) are kept between invocations.
+--last-failed then runs only the test runners that failed, or have not run, before;
+--changed also runs those whose executable or libraries have changed since.
+'''
+    parser = argparse.ArgumentParser(prog='longbow-test-suite', formatter_class=argparse.RawDescriptionHelpFormatter, description=description)
+    parser.add_argument('-j', '--jobs', default=1, action="store", required=False, type=int,
+                        help="The number of test runners to run concurrently. Default 1.")
+    parser.add_argument('-t', '--timeout', default=0, action="store", required=False, type=float,
+                        help="The number of seconds after which a test runner is stopped and fails. Default 0, no limit.")
+    parser.add_argument('--history', default="", action="store", required=False, type=str,
+                        help="A file in which to keep the duration of each test runner between invocations. "
+                             "Test runners are started longest first, those with no recorded duration before any other.")
+    parser.add_argument('--slowest', default=0, action="store", required=False, type=int,
+                        help="List the given number of slowest test cases. Default 0, none.")
+    parser.add_argument('--regression-factor', dest="regressionFactor", default=TestHistory.DEFAULT_REGRESSION_FACTOR, action="store", required=False, type=float,
+                        help="With --history, list the fixtures and test cases that took this many times the mean of their previous runs. Default %.1f." % TestHistory.DEFAULT_REGRESSION_FACTOR)
+    parser.add_argument('--state', default="", action="store", required=False, type=str,
+                        help="A file in which to keep the exit status and dependencies of each test runner between invocations, for --changed and --last-failed.")
+    parser.add_argument('--changed', default=False, action="store_true", required=False,
+                        help="Run only the test runners that have changed, or whose libraries have changed, since they last ran, and those that failed.")
+    parser.add_argument('--last-failed', dest="lastFailed", default=False, action="store_true", required=False,
+                        help="Run only the test runners that failed when they last ran.")
+    parser.add_argument('-L', '--library-dir', dest="libraryDirectories", default=[], action="append", required=False, type=str,
+                        help="A directory searched for the shared libraries the test runners link with, for --changed. May be repeated.")
+    parser.add_argument('--shard', default=None, action="store", required=False, type=parseShard,
+                        help="Run only the i-th of N shards of the test runners, given as i/N. "
+                             "Every shard must be given the same list of test runners and read the same durations.")
+    parser.add_argument('--shard-history', dest="shardHistory", default="", action="store", required=False, type=str,
+                        help="A history file (see --history) by which the shards are balanced, which is only read, never saved. "
+                             "Default the --history file.")
+    parser.add_argument('--result', default="", action="store", required=False, type=str,
+                        help="A file to which to write the results, for longbow-test-suite merge.")
+    parser.add_argument('--junit-xml', dest="junitXml", default="", action="store", required=False, type=str,
+                        help="A JUnit XML file to which to write the results of each test case, rewritten as each test runner finishes.")
+    parser.add_argument('--json-lines', dest="jsonLines", default="", action="store", required=False, type=str,
+                        help="A file to which to write the results as JSON, one test runner per line, as each finishes.")
+    parser.add_argument("testRunners", metavar="testExecutable", help="Test runners to run", nargs="*")
+
+    args = parser.parse_args()
+
+    if len(args.testRunners) < 1:
+        parser.print_usage()
         sys.exit(1)
-    testRunners = testRunners + sys.argv[1:]
+
+    if (args.changed or args.lastFailed) and not args.state:
+        parser.error("--changed and --last-failed require --state")
 
     testSuite = LongBowTestSuite()
     testSuite.setOptions([ "--run-nonforked" ])
-    exitStatus = testSuite.run(testRunners)
+    testSuite.setJobs(args.jobs)
+    testSuite.setTimeout(args.timeout)
+    if args.history:
+        testSuite.setHistory(TestHistory.TestHistory(args.history))
+    selection = None
+    if args.shard is not None:
+        shardHistory = None
+        if args.shardHistory:
+            shardHistory = TestHistory.TestHistory(args.shardHistory)
+        selection = testSuite.shard(args.testRunners, args.shard[0] - 1, args.shard[1], shardHistory)
+    if args.state:
+        testSuite.setTestSelection(TestSelection.TestSelection(args.state, TestSelection.findLibraries(args.libraryDirectories)))
+        if args.changed or args.lastFailed:
+            candidates = selection
+            selection = testSuite.select(args.testRunners, selection, args.changed)
+            print "Selected %d of %d test runners" % (len(selection), len(args.testRunners if candidates is None else candidates))
+    testSuite.setResultWriters(TestResults.openResultWriters(args.junitXml, args.jsonLines))
+    exitStatus = testSuite.run(args.testRunners, selection)
+    for writer in testSuite.writers:
+        writer.close()
+    if args.slowest > 0:
+        print "\n".join(TestResults.formatSlowestTestCases(testSuite.testRunnerResults, args.slowest))
+    if args.history:
+        for line in TestResults.formatRegressions(testSuite.recordDurations(args.regressionFactor)):
+            print line
+        testSuite.history.save()
+    if args.state:
+        testSuite.testSelection.save()
+    if args.result:
+        testSuite.writeResult(args.result, len(args.testRunners), args.shard)
+    sys.exit(exitStatus)
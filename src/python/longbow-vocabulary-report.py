@@ -91,7 +91,7 @@ $
 	parser.add_argument('-f', '--function', default=False, action="store_true", help="print the vocabulary of each function in each target file.")
 	parser.add_argument('-', '--stdin', default=False, action="store_true", required=False, help="read the list of files from standard input rather than the command line.")
 	parser.add_argument('-a', '--average', default=False, action="store_true", required=False, help="display only the simple average of the average vocabulary of each target file.")
-	parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\" or \"csv\"")
+	parser.add_argument('-o', '--output', default="text", action="store", required=False, type=str, help="the output format: \"text\", \"csv\" or \"json\"")
 	parser.add_argument("files", help="Files to check", nargs="*")
 
 	args = parser.parse_args()
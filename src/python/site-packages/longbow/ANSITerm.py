@@ -59,6 +59,7 @@ import subprocess
 import re
 import sys
 import pprint
+import LongBow
 
 ansiRed = "\x1b[31m";
 ansiGreen = "\x1b[32m";
@@ -90,7 +91,7 @@ def colorize(color, chars):
 
 
 def printColorized(color, string):
-    print colorize(color, string)
+    LongBow.getReportSink().printLine(colorize(color, string))
     return
 
 
@@ -99,4 +100,4 @@ class ANSITerm:
     return
 
   def printColorized(self, color, string):
-    print colorize(color, string)
+    printColorized(color, string)
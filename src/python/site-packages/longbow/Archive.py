@@ -0,0 +1,208 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import re
+import subprocess
+
+# An index of the members of a static library (ar(1) archive),
+# built once per library by reading the archive member headers directly.
+# The index maps the stem of each member name (the name up to the first '.') to the member,
+# and records where the content of each member begins within the archive,
+# so a member can be read in place without extracting it.
+# The members of a GNU thin archive are not within the archive at all,
+# so the index records the path of the file each one names instead.
+
+ARMAG = "!<arch>\n"
+THINMAG = "!<thin>\n"
+ARFMAG = "`\n"
+HEADER_SIZE = 60
+
+_memberPathPattern = re.compile(r"^(.*)\(([^()]+)\)$")
+
+_archiveIndexes = { }
+
+def parseMemberPath(path):
+    '''
+    Given a path of the form "library.a(member.o)", return the tuple (library path, member name),
+    otherwise return (path, None).
+    '''
+    match = _memberPathPattern.match(path)
+    if match:
+        return (match.group(1), match.group(2))
+    return (path, None)
+
+
+def readMembers(libraryPath):
+    '''
+    Read the member headers of a System V (GNU), GNU thin or BSD format archive.
+
+    Returns a list of { "name", "offset", "size" } dictionaries in archive order,
+    where offset is the position of the first byte of the member content within the archive file.
+    The members of a thin archive have no content within it: their offset is None
+    and the dictionary also has "path", the file the member names, relative to the directory of the archive.
+    Their name is the last component of that path.
+    Returns None if the file is not an archive this reader understands.
+    '''
+    result = []
+    with open(libraryPath, "rb") as file:
+        magic = file.read(len(ARMAG))
+        if magic != ARMAG and magic != THINMAG:
+            return None
+        thin = magic == THINMAG
+
+        fileSize = os.fstat(file.fileno()).st_size
+        longNames = ""
+        position = len(ARMAG)
+        while position + HEADER_SIZE <= fileSize:
+            file.seek(position)
+            header = file.read(HEADER_SIZE)
+            if header[58:60] != ARFMAG:
+                return None
+
+            name = header[0:16].rstrip(" ")
+            size = int(header[48:58])
+            offset = position + HEADER_SIZE
+            nextPosition = offset + size + (size & 1)
+
+            if name.startswith("#1/"):
+                # BSD: the name immediately follows the header.
+                nameLength = int(name[3:])
+                name = file.read(nameLength).rstrip("\0")
+                offset = offset + nameLength
+                size = size - nameLength
+            elif name == "//":
+                longNames = file.read(size)
+                name = None
+            elif name == "/" or name == "/SYM64/":
+                name = None
+            elif name.startswith("/"):
+                # GNU: an offset into the long name table.
+                start = int(name[1:])
+                name = longNames[start:longNames.index("\n", start)].rstrip("/")
+            else:
+                name = name.rstrip("/")
+
+            if thin and name:
+                # Only the symbol and long name tables are within a thin archive.
+                result.append({ "name" : os.path.basename(name), "offset" : None, "size" : size,
+                                "path" : os.path.join(os.path.dirname(libraryPath), name) })
+                position = offset
+                continue
+
+            if name and not name.startswith("__.SYMDEF"):
+                result.append({ "name" : name, "offset" : offset, "size" : size })
+            position = nextPosition
+
+    return result
+
+
+def listMembers(libraryPath):
+    '''
+    List the members of an archive using ar(1), for the archive formats readMembers does not understand.
+    The offset of each member is None.
+    '''
+    output = subprocess.check_output(["/usr/bin/ar", "-t", libraryPath])
+    return map(lambda name: { "name" : name, "offset" : None, "size" : None }, output.splitlines())
+
+
+class ArchiveIndex:
+    def __init__(self, libraryPath):
+        self.libraryPath = libraryPath
+        members = readMembers(libraryPath)
+        if members is None:
+            members = listMembers(libraryPath)
+        self.members = members
+
+        self.byName = { }
+        self.byStem = { }
+        for member in self.members:
+            # The first member of a given name or stem wins, as it would for a linear search.
+            self.byName.setdefault(member["name"], member)
+            self.byStem.setdefault(member["name"].split(".")[0], member)
+        return
+
+    def getMembers(self):
+        return self.members
+
+    def getMember(self, name):
+        '''
+        Return the member with the given name, or None.
+        '''
+        return self.byName.get(name)
+
+    def getMemberForStem(self, stem):
+        '''
+        Return the first member whose name up to the first '.' is stem, or None.
+        '''
+        return self.byStem.get(stem)
+
+
+def getArchiveIndex(libraryPath):
+    '''
+    Get the ArchiveIndex for the named library.
+    The index is built once and reused until the modification time or size of the library changes.
+    '''
+    stat = os.stat(libraryPath)
+    key = os.path.abspath(libraryPath)
+    stamp = (stat.st_mtime, stat.st_size)
+    if key in _archiveIndexes and _archiveIndexes[key][0] == stamp:
+        return _archiveIndexes[key][1]
+
+    result = ArchiveIndex(libraryPath)
+    _archiveIndexes[key] = (stamp, result)
+    return result
@@ -0,0 +1,211 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+import os
+import bisect
+import json
+import tempfile
+import threading
+
+# The file name extensions of the build artifacts that are indexed.
+EXTENSIONS = (".o", ".gcda", ".gcno")
+
+
+class ArtifactIndex:
+    '''
+    An index of the object (.o) and coverage (.gcda, .gcno) files beneath one or more directories.
+
+    Each directory tree is walked once, the first time it is searched,
+    and a search of a directory within a tree that has already been walked is answered from that tree.
+    The index may be saved to a file and loaded by a later run,
+    which reuses each tree whose directories have not been modified since it was walked.
+    '''
+    def __init__(self):
+        self.trees = { }
+        self.lock = threading.Lock()
+        return
+
+    def walkTree(self, root, visit=None):
+        '''
+        Walk the directory tree, returning a dictionary of the form:
+        { "directories" : { directory : modification time }, "files" : [ [ directory, file name ] ] }
+        The files are listed in the order os.walk finds them.
+        If visit is not None, visit(directory, file names) is called for each directory,
+        so a caller can collect other files in the same walk.
+        '''
+        directories = { }
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            try:
+                directories[dirpath] = os.stat(dirpath).st_mtime
+            except OSError:
+                continue
+            if visit is not None:
+                visit(dirpath, filenames)
+            for filename in filenames:
+                if filename.endswith(EXTENSIONS):
+                    files.append([dirpath, filename])
+        return { "directories" : directories, "files" : files }
+
+    def indexTree(self, tree):
+        '''
+        Add to the tree the list of its file names in sorted order and the corresponding (order found, directory) tuples.
+        '''
+        files = tree["files"]
+        entries = sorted(map(lambda order: (files[order][1], order, files[order][0]), range(len(files))))
+        tree["names"] = map(lambda entry: entry[0], entries)
+        tree["entries"] = map(lambda entry: (entry[1], entry[2]), entries)
+        return tree
+
+    def getTree(self, directory):
+        '''
+        Return the walked tree that contains the directory, walking the directory if there is none.
+        '''
+        with self.lock:
+            for root in self.trees:
+                if directory == root or directory.startswith(os.path.join(root, "")):
+                    return self.trees[root]
+
+            tree = self.indexTree(self.walkTree(directory))
+            self.trees[directory] = tree
+            return tree
+
+    def addTree(self, root, tree):
+        '''
+        Add a tree walked by walkTree, replacing any previous tree of the same root.
+        '''
+        with self.lock:
+            self.trees[root] = self.indexTree(tree)
+        return
+
+    def findFiles(self, directory, prefix, extension):
+        '''
+        Return the paths of the files beneath the directory whose names start with prefix and end with extension,
+        in the same order as Language_C.findFiles(directory, prefix + "*" + extension).
+        '''
+        directory = os.path.abspath(directory)
+        tree = self.getTree(directory)
+        names = tree["names"]
+        directoryPrefix = os.path.join(directory, "")
+
+        matches = []
+        i = bisect.bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            (order, dirpath) = tree["entries"][i]
+            if names[i].endswith(extension) and len(names[i]) >= len(prefix) + len(extension):
+                if dirpath == directory or dirpath.startswith(directoryPrefix):
+                    matches.append((order, os.path.join(dirpath, names[i])))
+            i = i + 1
+
+        return map(lambda match: match[1], sorted(matches))
+
+    def hasCoverageFiles(self, directory, prefix):
+        '''
+        Return True if there are both .gcda and .gcno files beneath the directory whose names start with prefix.
+        '''
+        return len(self.findFiles(directory, prefix, ".gcda")) > 0 and len(self.findFiles(directory, prefix, ".gcno")) > 0
+
+    def isCurrent(self, tree):
+        '''
+        Return True if none of the directories of the tree have been modified since it was walked.
+        '''
+        for directory in tree["directories"]:
+            try:
+                if os.stat(directory).st_mtime != tree["directories"][directory]:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def load(self, fileName):
+        '''
+        Add the trees saved in the named file that are still current.
+        A missing or unreadable file is the same as an empty one.
+        '''
+        try:
+            with open(fileName, "r") as file:
+                trees = json.load(file)
+        except (IOError, ValueError):
+            return
+
+        for root in trees:
+            if self.isCurrent(trees[root]):
+                self.trees[root.encode("utf-8")] = self.indexTree(self.decodeTree(trees[root]))
+        return
+
+    def decodeTree(self, tree):
+        directories = dict(map(lambda item: (item[0].encode("utf-8"), item[1]), tree["directories"].items()))
+        files = map(lambda file: [file[0].encode("utf-8"), file[1].encode("utf-8")], tree["files"])
+        return { "directories" : directories, "files" : files }
+
+    def save(self, fileName):
+        '''
+        Save the walked trees to the named file, replacing it atomically.
+        '''
+        trees = dict(map(lambda root: (root, { "directories" : self.trees[root]["directories"], "files" : self.trees[root]["files"] }), self.trees))
+
+        directory = os.path.dirname(os.path.abspath(fileName))
+        (fd, temporaryPath) = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as output:
+            json.dump(trees, output)
+        os.rename(temporaryPath, fileName)
+        return
+
+# The ArtifactIndex shared by every search that is not given one explicitly.
+artifactIndex = ArtifactIndex()
+
+def getArtifactIndex():
+    return artifactIndex
@@ -0,0 +1,287 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import re
+
+import FileUtil
+
+# A single pass scanner for the top-level declarations in a C source or header file.
+#
+# The scanner tokenizes the file once, discarding comments, preprocessor directives and string literals,
+# and reports the typedefs, enumerations, structs and function definitions it contains.
+# The results for each file are remembered until the file is modified,
+# so the reports that examine the same files do not repeatedly read and scan them.
+
+_tokenPattern = re.compile(r'''
+      (?P<comment>/\*.*?\*/|//[^\n]*)
+    | (?P<preprocessor>^[ \t]*\#(?:\\\n|[^\n])*)
+    | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+    | (?P<identifier>[A-Za-z_]\w*)
+    | (?P<number>\.?\d(?:[eEpP][+-]|[\w.])*)
+    | (?P<newline>\n)
+    | (?P<punctuation>\S)
+    ''', re.VERBOSE | re.MULTILINE | re.DOTALL)
+
+_aggregateKinds = [ "struct", "union", "enum" ]
+
+# Identifiers that look like function calls but never name the function being defined.
+_attributeNames = [ "__attribute__", "__declspec", "__asm__", "asm" ]
+
+_declarationCache = { }
+
+def tokenize(text):
+    '''
+    Return the list of (token, lineNumber) tuples for the C language text.
+    Comments, preprocessor directives and string and character literals are discarded.
+    '''
+    result = []
+    lineNumber = 1
+    for match in _tokenPattern.finditer(text):
+        kind = match.lastgroup
+        if kind == "newline":
+            lineNumber = lineNumber + 1
+        elif kind == "identifier" or kind == "number" or kind == "punctuation":
+            result.append((match.group(kind), lineNumber))
+        else:
+            lineNumber = lineNumber + match.group(kind).count("\n")
+    return result
+
+
+def _isIdentifier(token):
+    return token[0] == "_" or token[0].isalpha()
+
+
+def _declaratorNames(statement):
+    '''
+    Return the names declared by a declaration statement,
+    being the identifiers outside of any braces, parentheses or brackets that are followed by ',', ';', '[' or '='.
+    A declarator such as (*name)(...) is recognised by the identifier following the '*' within the first parentheses.
+    '''
+    result = []
+    depth = 0
+    for i in range(len(statement)):
+        token = statement[i][0]
+        if token in "{([":
+            depth = depth + 1
+        elif token in "})]":
+            depth = depth - 1
+        elif depth == 0 and _isIdentifier(token):
+            following = statement[i + 1][0] if i + 1 < len(statement) else ";"
+            if following in [",", ";", "[", "="]:
+                result.append(token)
+
+    if len(result) == 0:
+        for i in range(len(statement) - 2):
+            if statement[i][0] == "(" and statement[i + 1][0] in ["*", "^"] and _isIdentifier(statement[i + 2][0]):
+                result.append(statement[i + 2][0])
+                break
+    return result
+
+
+def _enumerationValues(statement):
+    '''
+    Return the names of the enumeration constants within the braces of an enum declaration statement.
+    '''
+    result = []
+    depth = 0
+    previous = None
+    for (token, lineNumber) in statement:
+        if token in "{([":
+            depth = depth + 1
+        elif token in "})]":
+            depth = depth - 1
+        elif depth == 1 and previous in ["{", ","] and _isIdentifier(token):
+            result.append(token)
+        previous = token
+    return result
+
+
+def _aggregateTag(statement, start):
+    '''
+    Return the (kind, tag) of the struct, union or enum specifier beginning at statement[start],
+    where tag is None if the aggregate is anonymous.
+    '''
+    kind = statement[start][0]
+    tag = None
+    if start + 1 < len(statement) and _isIdentifier(statement[start + 1][0]):
+        tag = statement[start + 1][0]
+    return (kind, tag)
+
+
+def _scanDeclaration(statement, result):
+    lineNumber = statement[0][1]
+    tokens = map(lambda token: token[0], statement)
+    hasBody = "{" in tokens
+
+    aggregateIndex = None
+    for kind in _aggregateKinds:
+        if kind in tokens:
+            index = tokens.index(kind)
+            if aggregateIndex is None or index < aggregateIndex:
+                aggregateIndex = index
+
+    aggregateKind = None
+    if aggregateIndex is not None:
+        (aggregateKind, tag) = _aggregateTag(statement, aggregateIndex)
+        if aggregateKind in ["struct", "union"] and tag is not None and hasBody:
+            result["structs"].append({ "name" : tag, "kind" : aggregateKind, "lineNumber" : lineNumber })
+
+    if tokens[0] == "typedef":
+        kind = "other"
+        if aggregateIndex == 1:
+            kind = aggregateKind
+        for name in _declaratorNames(statement):
+            result["typedefs"].append({ "name" : name, "kind" : kind, "lineNumber" : lineNumber })
+            if kind == "enum":
+                result["enums"].append({ "name" : name, "values" : _enumerationValues(statement), "typedef" : True, "lineNumber" : lineNumber })
+    elif aggregateKind == "enum" and hasBody:
+        result["enums"].append({ "name" : tag, "values" : _enumerationValues(statement), "typedef" : False, "lineNumber" : lineNumber })
+    return
+
+
+def _functionName(statement):
+    '''
+    If the statement preceding a '{' is the declarator of a function definition, return the name of the function.
+    '''
+    if statement[-1][0] != ")" or statement[0][0] in ["typedef", "struct", "union", "enum"] or "=" in map(lambda token: token[0], statement):
+        return None
+    for i in range(len(statement) - 1):
+        token = statement[i][0]
+        if statement[i + 1][0] == "(" and _isIdentifier(token) and token not in _attributeNames:
+            return token
+    return None
+
+
+def scanDeclarations(text):
+    '''
+    Scan the C language text for its top-level declarations, returning a dictionary of the form:
+
+    { "typedefs"  : list of { "name", "kind" ("struct", "union", "enum" or "other"), "lineNumber" },
+      "enums"     : list of { "name", "values" (the enumeration constant names), "typedef", "lineNumber" },
+      "structs"   : list of { "name", "kind" ("struct" or "union"), "lineNumber" },
+      "functions" : list of { "name", "static", "lineNumber" } }
+    '''
+    result = { "typedefs" : [], "enums" : [], "structs" : [], "functions" : [] }
+
+    tokens = tokenize(text)
+    statement = []
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i = i + 1
+
+        if depth == 0:
+            if token[0] == ";":
+                if len(statement) > 0:
+                    _scanDeclaration(statement, result)
+                statement = []
+                continue
+            if token[0] == "{":
+                if map(lambda t: t[0], statement) == ["extern"]:
+                    # extern "C" { ... } encloses declarations, it is not itself one.
+                    statement = []
+                    continue
+                functionName = _functionName(statement) if len(statement) > 0 else None
+                if functionName is not None:
+                    isStatic = "static" in map(lambda t: t[0], statement)
+                    result["functions"].append({ "name" : functionName, "static" : isStatic, "lineNumber" : statement[0][1] })
+                    # Skip the function body.
+                    bodyDepth = 1
+                    while i < len(tokens) and bodyDepth > 0:
+                        if tokens[i][0] == "{":
+                            bodyDepth = bodyDepth + 1
+                        elif tokens[i][0] == "}":
+                            bodyDepth = bodyDepth - 1
+                        i = i + 1
+                    statement = []
+                    continue
+            if token[0] == "}":
+                # The end of an extern "C" block.
+                statement = []
+                continue
+
+        if token[0] == "{":
+            depth = depth + 1
+        elif token[0] == "}":
+            depth = depth - 1
+        statement.append(token)
+
+    return result
+
+
+def getDeclarations(fileName):
+    '''
+    Get the top-level declarations in the named file as returned by scanDeclarations,
+    or None if the file does not exist.
+
+    The result is remembered and reused until the modification time or size of the file changes.
+    '''
+    try:
+        stat = os.stat(fileName)
+    except OSError:
+        return None
+
+    key = os.path.abspath(fileName)
+    stamp = (stat.st_mtime, stat.st_size)
+    if key in _declarationCache and _declarationCache[key][0] == stamp:
+        return _declarationCache[key][1]
+
+    result = scanDeclarations(FileUtil.readFileString(fileName))
+    _declarationCache[key] = (stamp, result)
+    return result
@@ -60,6 +60,7 @@ import re
 import subprocess
 import difflib
 import csv
+import mmap
 # import argparse
 import pprint
 # sys.path.append("${INSTALL_PYTHON_DIR}")
@@ -71,6 +72,8 @@ import GCovSummary
 import FileUtil
 import ANSITerm
 import Language_C
+import ArtifactIndex
+import CoverageStore
 
 def checkTestExecutable(executableFileName):
     result = False
@@ -79,12 +82,7 @@ def checkTestExecutable(executableFileName):
         return result
 
     path = os.path.dirname(executableFileName)
-    pattern = os.path.basename(executableFileName)+'*.gcda'
-    if not Language_C.findFiles(path, pattern):
-        return result
-
-    pattern = os.path.basename(executableFileName)+'*.gcno'
-    if not Language_C.findFiles(path, pattern):
+    if not ArtifactIndex.getArtifactIndex().hasCoverageFiles(path, os.path.basename(executableFileName)):
         return result
 
     result = True
@@ -117,83 +115,128 @@ Given a file name, look in the canonical places for a corresponding LongBow test
     return result
 
 
-def textSummary(args, filesAndTests, gCovResults, prefix=""):
-
+def computeSummary(args, filesAndTests, gCovResults):
     summary = GCov.computeSummary(filesAndTests, gCovResults)
 
     if not args.includeTestSources:
         summary = GCovSummary.removeTestSourceFiles(summary)
+    return summary
+
+
+def coverageRecords(summary):
+    '''
+    The report records (see LongBow.makeRecord) of the coverage of each file in the given summary, ordered by file name.
+    '''
+    result = []
+    for testedFile in sorted(summary.keys()):
+        coverage = summary[testedFile]["coverage"]
+        result.append(LongBow.makeRecord("coverage", testedFile, "coverage", coverage, coverage, direct=summary[testedFile]["direct"]))
+    return result
+
+
+def averageRecord(summary):
+    score = GCovSummary.averageCoverage(summary)
+    return LongBow.makeRecord("coverage", None, "averageCoverage", score, score)
+
+
+def textSummary(args, filesAndTests, gCovResults, prefix=""):
+
+    summary = computeSummary(args, filesAndTests, gCovResults)
 
     if len(summary) == 0:
         return
 
     if args.explain:
-        pp = pprint.PrettyPrinter(indent=2, width=150)
+        pp = pprint.PrettyPrinter(indent=2, width=150, stream=LongBow.getReportSink())
         pp.pprint(summary)
 
     maximumFileLength = max(map(lambda entry: len(entry), summary))
 
     format = "%s%-" + str(maximumFileLength) + "s %6s"
-    print format % (prefix, "File Path", "Score")
+    LongBow.getReportSink().printLine(format % (prefix, "File Path", "Score"))
 
     format = "%s%-" + str(maximumFileLength) + "s %6.2f"
-    for testedFile in sorted(summary.keys()):
-        string = format % (prefix, testedFile, summary[testedFile]["coverage"])
-        if summary[testedFile]["direct"] == "indirect":
+    for record in coverageRecords(summary):
+        string = format % (prefix, record["file"], record["value"])
+        if record["direct"] == "indirect":
             ANSITerm.printColorized("magenta", string)
         else:
-            LongBow.scorePrinter(eval(args.distribution), summary[testedFile]["coverage"], string)
+            LongBow.scorePrinter(eval(args.distribution), record["score"], string)
 
     return
 
 
 def textAverage(args, filesAndTests, gcovResults):
-    summary = GCov.computeSummary(filesAndTests, gcovResults)
+    record = averageRecord(computeSummary(args, filesAndTests, gcovResults))
 
-    if not args.includeTestSources:
-        summary = GCovSummary.removeTestSourceFiles(summary)
-
-    score = GCovSummary.averageCoverage(summary)
-
-    LongBow.scorePrinter(eval(args.distribution), score, "%.2f" % (score))
-    return score
+    LongBow.scorePrinter(eval(args.distribution), record["score"], "%.2f" % (record["value"]))
+    return record["value"]
 
 
 def csvSummary(args, filesAndTests, gCovResults):
-    summary = GCov.computeSummary(filesAndTests, gCovResults)
-
-    if not args.includeTestSources:
-        summary = GCovSummary.removeTestSourceFiles(summary)
+    summary = computeSummary(args, filesAndTests, gCovResults)
 
-    if len(summary) > 0:
-        for testedFile in sorted(summary.keys()):
-            outputString = "%s,%.2f" % (testedFile, summary[testedFile]["coverage"])
-            LongBow.scorePrinter(eval(args.distribution), summary[testedFile]["coverage"], outputString)
+    for record in coverageRecords(summary):
+        outputString = "%s,%.2f" % (record["file"], record["value"])
+        LongBow.scorePrinter(eval(args.distribution), record["score"], outputString)
 
     return
 
 
 def csvAverage(args, filesAndTests, gcovResults):
-    summary = GCov.computeSummary(filesAndTests, gcovResults)
+    record = averageRecord(computeSummary(args, filesAndTests, gcovResults))
 
-    if not args.includeTestSources:
-        summary = GCovSummary.removeTestSourceFiles(summary)
+    LongBow.scorePrinter(eval(args.distribution), record["score"], "%.2f" % (record["value"]))
+    return
 
-    score = GCovSummary.averageCoverage(summary)
 
-    LongBow.scorePrinter(eval(args.distribution), score, "%.2f" % (score))
+def jsonSummary(args, filesAndTests, gCovResults):
+    LongBow.printRecords(coverageRecords(computeSummary(args, filesAndTests, gCovResults)))
     return
 
 
-def textVisualDisplayGcovLine(line):
-    token = line.split(":", 2)
-    if len(token) == 3:
-        if token[0] == "#####":
-            print ANSITerm.colorize("red", token[1] + " " + token[2])
-        elif token[0] == "$$$$$":
-            print ANSITerm.colorize("yellow", token[1] + " " + token[2])
-        else:
-            print ANSITerm.colorize("green", token[1] + " " + token[2])
+def jsonAverage(args, filesAndTests, gcovResults):
+    LongBow.printRecords([averageRecord(computeSummary(args, filesAndTests, gcovResults))])
+    return
+
+
+def textVisualDisplayLineSets(fileName, coverage):
+    '''
+    Display the source file coloured by the merged coverage of its lines (see GCov.mergeCoverage).
+    Lines that were not executed are shown in red,
+    lines executed with a block that was not in yellow,
+    and lines executed only by the tests of other files in magenta.
+
+    The source file is read through mmap one line at a time, so only the line being displayed is held in memory.
+    '''
+    # The characters of each bitset, least significant bit first, so the character at index n is the bit for line n.
+    bits = lambda lineSet: bin(lineSet)[:1:-1]
+    executableLines = bits(coverage["executableLines"])
+    directLines = bits(coverage["directLines"])
+    indirectLines = bits(coverage["indirectLines"])
+    unexecutedBlockLines = bits(coverage.get("unexecutedBlockLines", 0))
+    isSet = lambda lineSet, lineNumber: lineNumber < len(lineSet) and lineSet[lineNumber] == "1"
+
+    output = LongBow.getReportSink()
+    with open(fileName, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            lineNumber = 0
+            for sourceLine in iter(source.readline, ""):
+                lineNumber = lineNumber + 1
+                text = "%5d %s" % (lineNumber, sourceLine.rstrip("\n"))
+                if isSet(indirectLines, lineNumber):
+                    output.printLine(ANSITerm.colorize("magenta", text))
+                elif isSet(executableLines, lineNumber) and not isSet(directLines, lineNumber):
+                    output.printLine(ANSITerm.colorize("red", text))
+                elif isSet(unexecutedBlockLines, lineNumber):
+                    output.printLine(ANSITerm.colorize("yellow", text))
+                else:
+                    output.printLine(ANSITerm.colorize("green", text))
+        finally:
+            source.close()
 
     return
 
@@ -202,16 +245,15 @@ def textVisual(args, filesAndTests, gcovResults):
 
     summary = GCov.computeSummary(filesAndTests, gcovResults)
     if args.explain:
-        pp = pprint.PrettyPrinter(indent=2, width=150)
+        pp = pprint.PrettyPrinter(indent=2, width=150, stream=LongBow.getReportSink())
         pp.pprint(summary)
         pp.pprint(filesAndTests)
 
     for entry in filesAndTests:
-        print entry[0]
+        LongBow.getReportSink().printLine(entry[0])
         try:
-            gcovLines = summary[entry[0]]["gcovLines"]
-            map(lambda line: textVisualDisplayGcovLine(line.strip()), gcovLines)
-        except KeyError:
+            textVisualDisplayLineSets(entry[0], summary[entry[0]])
+        except (KeyError, IOError):
             print >> sys.stderr, "No coverage information for", entry[0]
 
     return
@@ -222,6 +264,8 @@ def displaySummary(args, filesAndTests, newGCovResults):
         textSummary(args, filesAndTests, newGCovResults)
     elif args.output == "csv":
         csvSummary(args, filesAndTests, newGCovResults)
+    elif args.output == "json":
+        jsonSummary(args, filesAndTests, newGCovResults)
     else:
         print >> sys.stderr, "Unsupported output type"
     return
@@ -232,6 +276,8 @@ def displayAverage(args, filesAndTests, gcovResults):
         textAverage(args, filesAndTests, gcovResults)
     elif args.output == "csv":
         csvAverage(args, filesAndTests, gcovResults)
+    elif args.output == "json":
+        jsonAverage(args, filesAndTests, gcovResults)
     else:
         print >> sys.stderr, "Unsupported output type"
     return
@@ -239,7 +285,7 @@ def displayAverage(args, filesAndTests, gcovResults):
 
 def explain(args, filesAndTests, gcovResults):
 
-    pp = pprint.PrettyPrinter(indent=2, width=150)
+    pp = pprint.PrettyPrinter(indent=2, width=150, stream=LongBow.getReportSink())
     pp.pprint(gcovResults)
 
     return
@@ -250,13 +296,13 @@ def getFilesAndTests(fileNames, testDirs=[]):
     return filesAndTests
 
 
-def gradeAndPrint(targets, testDirs=[], problemsOnly=False, prefix=""):
+def gradeAndPrint(targets, testDirs=[], problemsOnly=False, prefix="", jobs=1, backend="text"):
     filesAndTests = getFilesAndTests(targets, testDirs)
-    newGCovResults = map(lambda fileAndTestFile: GCov.getCoverage(fileAndTestFile[1]), filesAndTests)
+    newGCovResults = GCov.getCoverages(map(lambda fileAndTestFile: fileAndTestFile[1], filesAndTests), jobs, backend)
 
     summarys = GCov.computeSummary(filesAndTests, newGCovResults)
     if len(summarys) < 1:
-        print "%sNo GCov Results - Please be sure to run 'make check' first" % prefix
+        LongBow.getReportSink().printLine("%sNo GCov Results - Please be sure to run 'make check' first" % prefix)
         return False
     summarys = GCovSummary.removeTestSourceFiles(summarys)
 
@@ -267,7 +313,7 @@ def gradeAndPrint(targets, testDirs=[], problemsOnly=False, prefix=""):
     distribution=[99,90]
     maximumFileLength = max(map(lambda entry: len(os.path.relpath(entry)), paths))
     format = "%s%-" + str(maximumFileLength) + "s %6s"
-    print format % (prefix, "File Path", "Score")
+    LongBow.getReportSink().printLine(format % (prefix, "File Path", "Score"))
     format = "%s%-" + str(maximumFileLength) + "s %6.2f"
     for path in sorted(paths):
         string = format % (prefix, os.path.relpath(path), summarys[path]["coverage"])
@@ -280,6 +326,11 @@ def commandLineMain(args, fileNames, testDir=""):
     testDirs = []
     if testDir:
         testDirs.append(testDir)
+    if args.artifactIndex:
+        ArtifactIndex.getArtifactIndex().load(args.artifactIndex)
+    if args.store:
+        GCov.setCoverageStore(CoverageStore.CoverageStore(args.store))
+
     fileNames = map(lambda fileName: os.path.abspath(fileName), fileNames)
     filesAndTests = map(lambda fileName: [fileName, findTestExecutable(fileName, testDirs)], fileNames)
 
@@ -288,7 +339,7 @@ def commandLineMain(args, fileNames, testDir=""):
         outputFormat = "%s has no corresponding test executable or coverage data.\n"
         map(lambda filesAndTests: sys.stderr.write(outputFormat % (filesAndTests[0])), filesWithNoTest)
 
-    gCovResults = map(lambda fileAndTestFile: GCov.getCoverage(fileAndTestFile[1]), filesAndTests)
+    gCovResults = GCov.getCoverages(map(lambda fileAndTestFile: fileAndTestFile[1], filesAndTests), args.jobs, args.backend)
 
     if args.summary is True:
         displaySummary(args, filesAndTests, gCovResults)
@@ -299,4 +350,10 @@ def commandLineMain(args, fileNames, testDir=""):
     elif args.explain is True:
         explain(args, filesAndTests, gCovResults)
 
+    if args.artifactIndex:
+        ArtifactIndex.getArtifactIndex().save(args.artifactIndex)
+    if args.store:
+        GCov.coverageStore.close()
+        GCov.setCoverageStore(None)
+
     return True
@@ -0,0 +1,128 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+import os
+import sqlite3
+import threading
+import cPickle
+
+# The keys of a tested file that are not kept in the store: the line sets GCov.computeSummary derives from 'lineCounts'.
+_transientKeys = [ "lineSets" ]
+
+
+class CoverageStore:
+    '''
+    A persistent store, in an SQLite database, of the coverage computed for each test executable.
+
+    Each entry records the modification time and size of the test executable's .gcda and .gcno files,
+    and is only returned while both are unchanged, so only the test executables that have been run again
+    (or rebuilt) since their coverage was stored need to have it computed again.
+    '''
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.lock = threading.Lock()
+        # The store is shared by the threads that run gcov concurrently.
+        self.connection = sqlite3.connect(fileName, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS coverage ("
+                                "testExecutable TEXT NOT NULL, backend TEXT NOT NULL, stamp TEXT NOT NULL, result BLOB NOT NULL, "
+                                "PRIMARY KEY (testExecutable, backend))")
+        return
+
+    def computeStamp(self, gcdaFileName, gcnoFileName):
+        '''
+        Return a string identifying the current content of the .gcda and .gcno files, or None if either cannot be read.
+        '''
+        try:
+            gcda = os.stat(gcdaFileName)
+            gcno = os.stat(gcnoFileName)
+        except OSError:
+            return None
+        return "%s %r %d %s %r %d" % (gcdaFileName, gcda.st_mtime, gcda.st_size, gcnoFileName, gcno.st_mtime, gcno.st_size)
+
+    def get(self, testExecutableFileName, backend, stamp):
+        '''
+        Return the stored coverage of the test executable if it was stored with the same stamp, otherwise None.
+        '''
+        with self.lock:
+            row = self.connection.execute("SELECT stamp, result FROM coverage WHERE testExecutable = ? AND backend = ?",
+                                          (testExecutableFileName, backend)).fetchone()
+        if row is None or row[0] != stamp:
+            return None
+        return cPickle.loads(str(row[1]))
+
+    def put(self, testExecutableFileName, backend, stamp, coverage):
+        '''
+        Store the coverage of the test executable, as returned by GCov.getCoverage, with the stamp of its .gcda and .gcno files.
+        '''
+        storedCoverage = { }
+        for name in coverage:
+            testedFiles = { }
+            for testedFileName in coverage[name]["testedFiles"]:
+                testedFile = coverage[name]["testedFiles"][testedFileName]
+                testedFiles[testedFileName] = dict(filter(lambda item: not item[0] in _transientKeys, testedFile.items()))
+            storedCoverage[name] = { "testedFunctions" : coverage[name]["testedFunctions"], "testedFiles" : testedFiles }
+
+        result = sqlite3.Binary(cPickle.dumps(storedCoverage, cPickle.HIGHEST_PROTOCOL))
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO coverage (testExecutable, backend, stamp, result) VALUES (?, ?, ?, ?)",
+                                    (testExecutableFileName, backend, stamp, result))
+        return
+
+    def close(self):
+        with self.lock:
+            self.connection.commit()
+            self.connection.close()
+        return
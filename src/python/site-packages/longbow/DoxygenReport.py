@@ -94,9 +94,9 @@ def parseLine(line):
                     "severity" : fields[2].strip(),
                     "message" : " ".join(fields[3:]).strip()}
         elif line.startswith("error"):
-	          print line
+	          LongBow.getReportSink().printLine(line)
         elif len(line) > 0:
-          print "Consider using doxygen -s:", line
+          LongBow.getReportSink().printLine("Consider using doxygen -s: " + line)
 
     return result
 
@@ -122,6 +122,28 @@ def organize(entries):
 
     return result
 
+def documentationRecord(fileName, entries):
+    '''
+    The report record (see LongBow.makeRecord) of the lines of a file that doxygen reported as badly documented.
+    '''
+    badLines = len(entries)
+    totalLines =  LongBow.countLines(fileName)
+    score = float(totalLines - badLines) / float(totalLines) * 100.0
+    return LongBow.makeRecord("documentation", fileName, "undocumentedLines", badLines, score, totalLines=totalLines)
+
+def documentationRecords(documentation):
+    return map(lambda entry: documentationRecord(entry, documentation[entry]), documentation)
+
+def averageRecord(documentation):
+    records = documentationRecords(documentation)
+
+    if len(records) == 0:
+        averageScore = 100.0
+    else:
+        averageScore = sum(map(lambda record: record["score"], records)) / float(len(records))
+
+    return LongBow.makeRecord("documentation", None, "averageScore", averageScore, averageScore)
+
 def textualSummary(distribution, documentation):
     maxWidth = 0
     for entry in documentation:
@@ -129,36 +151,19 @@ def textualSummary(distribution, documentation):
             maxWidth = len(entry)
 
     formatString ="%-" + str(maxWidth) + "s %8d %8d   %.2f%%"
-    for entry in documentation:
-        badLines = len(documentation[entry])
-        totalLines =  LongBow.countLines(entry)
-        score = float(totalLines - badLines) / float(totalLines) * 100.0
-        LongBow.scorePrinter(distribution, score, formatString % (entry, totalLines, badLines, score))
+    for record in documentationRecords(documentation):
+        LongBow.scorePrinter(distribution, record["score"], formatString % (record["file"], record["totalLines"], record["value"], record["score"]))
     return
 
 def textualAverage(distribution, documentation, format):
-    sum = 0.0
-
-    for entry in documentation:
-        badLines = len(documentation[entry])
-        totalLines =  LongBow.countLines(entry)
-        score = float(totalLines - badLines) / float(totalLines) * 100.0
-        sum = sum + score
+    record = averageRecord(documentation)
 
-    if len(documentation) == 0:
-        averageScore = 100.0
-    else:
-        averageScore = sum / float(len(documentation))
-
-    LongBow.scorePrinter(distribution, averageScore, format % averageScore)
+    LongBow.scorePrinter(distribution, record["score"], format % record["value"])
 
 def csvSummary(distribution, documentation):
         formatString ="documentation,%s,%d,%d,%.2f%%"
-        for entry in documentation:
-            badLines = len(documentation[entry])
-            totalLines =  LongBow.countLines(entry)
-            score = float(totalLines - badLines) / float(totalLines) * 100.0
-            LongBow.scorePrinter(distribution, score, formatString % (entry, totalLines, badLines, score))
+        for record in documentationRecords(documentation):
+            LongBow.scorePrinter(distribution, record["score"], formatString % (record["file"], record["totalLines"], record["value"], record["score"]))
         return
 
 
@@ -194,8 +199,13 @@ def commandLineMain(args, fileNames):
     if args.summary:
         if args.output == "text":
             textualSummary(distribution, result)
+        elif args.output == "json":
+            LongBow.printRecords(documentationRecords(result))
         else:
             csvSummary(distribution, result)
 
     if args.average:
-        textualAverage(distribution, result, "%.2f")
+        if args.output == "json":
+            LongBow.printRecords([averageRecord(result)])
+        else:
+            textualAverage(distribution, result, "%.2f")
@@ -0,0 +1,286 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import mmap
+import struct
+
+import Archive
+
+# A reader for the symbol table of ELF32 and ELF64 object files, executables and shared libraries,
+# decoding the file in place through mmap rather than running nm(1) for each file.
+# A member of a static library is named "library.a(member.o)" and is read in place within the library.
+
+ELFMAG = "\x7fELF"
+
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+SHT_SYMTAB = 2
+SHT_NOBITS = 8
+SHT_DYNSYM = 11
+SHT_SYMTAB_SHNDX = 18
+
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xff00
+SHN_ABS = 0xfff1
+SHN_COMMON = 0xfff2
+SHN_XINDEX = 0xffff
+
+STB_LOCAL = 0
+STB_GLOBAL = 1
+STB_WEAK = 2
+
+STT_OBJECT = 1
+STT_FUNC = 2
+STT_COMMON = 5
+STT_TLS = 6
+STT_GNU_IFUNC = 10
+
+_formats = {
+    ELFCLASS32 : { "header" : "HHIIIIIHHHHHH", "section" : "IIIIIIIIII", "symbol" : "IIIBBH" },
+    ELFCLASS64 : { "header" : "HHIQQQIHHHHHH", "section" : "IIQQQQIIQQ", "symbol" : "IBBHQQ" },
+}
+
+_bindings = { STB_LOCAL : "local", STB_GLOBAL : "global", STB_WEAK : "weak" }
+
+_types = { STT_OBJECT : "object", STT_COMMON : "object", STT_TLS : "object", STT_FUNC : "function", STT_GNU_IFUNC : "function" }
+
+
+class ELFError(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+def _locate(fileName):
+    '''
+    Return the tuple (path, offset) locating the named file, or the named archive member, within a file.
+    A member of a thin archive is located at the start of the file it names.
+    The offset is None if the archive member cannot be located.
+    '''
+    (path, memberName) = Archive.parseMemberPath(fileName)
+    if memberName is None:
+        return (fileName, 0)
+
+    member = None
+    if os.path.isfile(path):
+        member = Archive.getArchiveIndex(path).getMember(memberName)
+    if member is None:
+        return (path, None)
+    if "path" in member:
+        # A member of a thin archive is the file it names.
+        return (member["path"], 0)
+    return (path, member["offset"])
+
+
+def isELF(fileName):
+    '''
+    Return True if the named file, or the named archive member, exists and begins with the ELF magic number.
+    '''
+    (path, offset) = _locate(fileName)
+    if offset is None:
+        return False
+    try:
+        with open(path, "rb") as file:
+            file.seek(offset)
+            return file.read(len(ELFMAG)) == ELFMAG
+    except IOError:
+        return False
+
+
+def _readString(data, offset):
+    end = data.find("\0", offset)
+    if end < 0:
+        raise ELFError("Unterminated string at offset %d" % (offset))
+    return data[offset:end]
+
+
+def _readSectionHeaders(data, base, endian, formats, shoff, shentsize, shnum):
+    sectionFormat = endian + formats["section"]
+    result = []
+    for i in range(shnum):
+        (name, type, flags, addr, offset, size, link, info, addralign, entsize) = struct.unpack_from(sectionFormat, data, base + shoff + i * shentsize)
+        result.append({ "type" : type, "flags" : flags, "offset" : offset, "size" : size, "link" : link, "entsize" : entsize })
+    return result
+
+
+def _classifySection(sections, shndx):
+    if shndx == SHN_UNDEF:
+        return "undefined"
+    elif shndx == SHN_ABS:
+        return "absolute"
+    elif shndx == SHN_COMMON:
+        return "common"
+    elif shndx >= len(sections):
+        return "other"
+
+    section = sections[shndx]
+    if section["flags"] & SHF_EXECINSTR:
+        return "text"
+    elif (section["flags"] & SHF_ALLOC) and ((section["flags"] & SHF_WRITE) or section["type"] == SHT_NOBITS):
+        return "data"
+    elif section["flags"] & SHF_ALLOC:
+        return "readOnlyData"
+    return "other"
+
+
+def readSymbols(data, base=0):
+    '''
+    Read the symbol table of the ELF file beginning at offset base within data,
+    which is a string or an mmap of the file (or of an archive containing it).
+
+    The result is a list of dictionaries, one for each named symbol, of the form:
+    { "name" : string,
+      "binding" : "local", "global", "weak" or "other",
+      "type" : "function", "object" or "other",
+      "section" : "undefined", "text", "data", "readOnlyData", "common", "absolute" or "other" }
+
+    The static symbol table is used if present, otherwise the dynamic symbol table.
+    '''
+    if data[base:base + len(ELFMAG)] != ELFMAG:
+        raise ELFError("Not an ELF file")
+
+    elfClass = ord(data[base + 4])
+    elfData = ord(data[base + 5])
+    if not elfClass in _formats:
+        raise ELFError("Unsupported ELF class %d" % (elfClass))
+    if elfData == ELFDATA2LSB:
+        endian = "<"
+    elif elfData == ELFDATA2MSB:
+        endian = ">"
+    else:
+        raise ELFError("Unsupported ELF data encoding %d" % (elfData))
+    formats = _formats[elfClass]
+
+    header = struct.unpack_from(endian + formats["header"], data, base + 16)
+    (shoff, shentsize, shnum, shstrndx) = (header[5], header[10], header[11], header[12])
+    if shoff == 0:
+        return []
+
+    # Extended section numbering keeps the real section count in the first section header.
+    if shnum == 0:
+        shnum = _readSectionHeaders(data, base, endian, formats, shoff, shentsize, 1)[0]["size"]
+    sections = _readSectionHeaders(data, base, endian, formats, shoff, shentsize, shnum)
+
+    symbolTable = None
+    for index in range(len(sections)):
+        if sections[index]["type"] == SHT_SYMTAB:
+            symbolTable = index
+            break
+    if symbolTable is None:
+        for index in range(len(sections)):
+            if sections[index]["type"] == SHT_DYNSYM:
+                symbolTable = index
+                break
+    if symbolTable is None:
+        return []
+
+    extendedIndexes = None
+    for section in sections:
+        if section["type"] == SHT_SYMTAB_SHNDX and section["link"] == symbolTable:
+            extendedIndexes = section
+
+    symbolSection = sections[symbolTable]
+    stringOffset = base + sections[symbolSection["link"]]["offset"]
+    symbolFormat = endian + formats["symbol"]
+    symbolSize = symbolSection["entsize"] or struct.calcsize(symbolFormat)
+
+    result = []
+    for i in range(1, symbolSection["size"] / symbolSize):
+        fields = struct.unpack_from(symbolFormat, data, base + symbolSection["offset"] + i * symbolSize)
+        if elfClass == ELFCLASS32:
+            (name, value, size, info, other, shndx) = fields
+        else:
+            (name, info, other, shndx, value, size) = fields
+
+        if name == 0:
+            continue
+
+        if shndx == SHN_XINDEX and extendedIndexes is not None:
+            shndx = struct.unpack_from(endian + "I", data, base + extendedIndexes["offset"] + i * 4)[0]
+
+        result.append({ "name" : _readString(data, stringOffset + name),
+                        "binding" : _bindings.get(info >> 4, "other"),
+                        "type" : _types.get(info & 0xf, "other"),
+                        "section" : _classifySection(sections, shndx) })
+    return result
+
+
+def getSymbols(fileName):
+    '''
+    Read the symbol table of the named ELF file, or the named ELF archive member.  See readSymbols.
+    '''
+    (path, offset) = _locate(fileName)
+    if offset is None:
+        raise ELFError("Cannot locate " + fileName)
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ELFError("Empty file " + fileName)
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return readSymbols(data, offset)
+        finally:
+            data.close()
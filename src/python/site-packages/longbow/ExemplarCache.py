@@ -0,0 +1,206 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import hashlib
+import tempfile
+import subprocess
+
+import FileUtil
+
+# The default maximum size, in bytes, of the cache before the least recently used entries are evicted.
+DEFAULT_MAXIMUM_SIZE = 256 * 1024 * 1024
+
+# The prefix of the names of the files entries are written to before they are renamed into place.
+# They are not entries, so eviction leaves them to the process writing them.
+TEMPORARY_PREFIX = ".tmp-"
+
+_commandVersions = { }
+
+def getCommandVersion(command):
+    '''
+    Get the version string reported by the exemplar command (eg. uncrustify --version).
+    The result is remembered for the life of the process.
+    '''
+    if not command in _commandVersions:
+        try:
+            _commandVersions[command] = subprocess.check_output([command, "--version"], stderr=subprocess.STDOUT).strip()
+        except (OSError, subprocess.CalledProcessError):
+            _commandVersions[command] = command
+    return _commandVersions[command]
+
+
+class ExemplarCache:
+    '''
+    A persistent, content-addressed cache of exemplar files.
+
+    Each entry is keyed by a hash of the content of the source file,
+    the content of the exemplar command configuration file, the version of the exemplar command and its options,
+    so an entry is only ever reused when reformatting the file would produce the identical exemplar.
+    Once the total size of the cache exceeds maximumSize bytes, the least recently used entries are removed.
+    '''
+    def __init__(self, directory, maximumSize=DEFAULT_MAXIMUM_SIZE):
+        self.directory = directory
+        self.maximumSize = maximumSize
+        self.configData = { }
+        self.totalSize = None
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        return
+
+    def computeKey(self, fileData, command, config, options=[]):
+        if not config in self.configData:
+            self.configData[config] = FileUtil.readFileString(config)
+
+        digest = hashlib.sha1()
+        digest.update(getCommandVersion(command))
+        digest.update("\0")
+        digest.update(" ".join(options))
+        digest.update("\0")
+        digest.update(self.configData[config])
+        digest.update("\0")
+        digest.update(fileData)
+        return digest.hexdigest()
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key[0:2], key)
+
+    def get(self, key):
+        '''
+        Return the cached exemplar for the given key, or None if there is no such entry.
+        '''
+        path = self.entryPath(key)
+        try:
+            result = FileUtil.readFileString(path)
+            # Mark the entry as recently used.
+            os.utime(path, None)
+        except (IOError, OSError):
+            result = None
+        return result
+
+    def put(self, key, exemplar):
+        path = self.entryPath(key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process created it first.
+                pass
+
+        # Write to a temporary file and rename it so concurrent readers never see a partial entry.
+        # The cache is only an optimisation, so an entry that cannot be written is simply not kept.
+        temporaryPath = None
+        try:
+            (fd, temporaryPath) = tempfile.mkstemp(dir=directory, prefix=TEMPORARY_PREFIX)
+            with os.fdopen(fd, "w") as output:
+                output.write(exemplar)
+            os.rename(temporaryPath, path)
+        except (IOError, OSError):
+            if temporaryPath is not None:
+                try:
+                    os.remove(temporaryPath)
+                except OSError:
+                    pass
+            return
+
+        if self.totalSize is None:
+            self.totalSize = self.computeTotalSize()
+        else:
+            self.totalSize = self.totalSize + len(exemplar)
+
+        if self.totalSize > self.maximumSize:
+            self.evict()
+        return
+
+    def listEntries(self):
+        '''
+        Return a list of (modification time, size, path) tuples for every entry in the cache,
+        excluding the temporary files of entries still being written.
+        '''
+        result = []
+        for root, dirnames, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.startswith(TEMPORARY_PREFIX):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                    result.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    pass
+        return result
+
+    def computeTotalSize(self):
+        return sum(map(lambda entry: entry[1], self.listEntries()))
+
+    def evict(self):
+        '''
+        Remove the least recently used entries until the cache is no larger than maximumSize.
+        '''
+        entries = sorted(self.listEntries())
+        self.totalSize = sum(map(lambda entry: entry[1], entries))
+
+        for (mtime, size, path) in entries:
+            if self.totalSize <= self.maximumSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.totalSize = self.totalSize - size
+        return
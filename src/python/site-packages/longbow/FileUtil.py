@@ -59,6 +59,41 @@ import sys
 import os
 import csv
 import subprocess
+import threading
+
+import ELF
+
+class SourceCache:
+    '''
+    The contents of the files read during one run of the reports,
+    so that each file is read from the file system once however many reports examine it.
+    '''
+    def __init__(self):
+        self.contents = { }
+        self.lock = threading.Lock()
+
+    def get(self, fileName):
+        key = os.path.abspath(fileName)
+        with self.lock:
+            result = self.contents.get(key)
+        if result is None:
+            with open(fileName, "r") as file:
+                result = file.read()
+            with self.lock:
+                self.contents[key] = result
+        return result
+
+    def __len__(self):
+        return len(self.contents)
+
+
+# If not None, the SourceCache from which readFileLines and readFileString take the contents of files.
+sourceCache = None
+
+def setSourceCache(cache):
+    global sourceCache
+    sourceCache = cache
+    return
 
 def readFileLines(fileName):
     '''
@@ -66,6 +101,9 @@ def readFileLines(fileName):
     '''
     result = None
 
+    if sourceCache is not None:
+        return sourceCache.get(fileName).splitlines(True)
+
     with open(fileName, "r") as file:
         result = file.readlines()
 
@@ -78,6 +116,9 @@ def readFileString(fileName):
     result = None
 
     if fileName != None and len(fileName) > 0:
+        if sourceCache is not None:
+            return sourceCache.get(fileName)
+
         with open (fileName, "r") as file:
             result = file.read()
 
@@ -140,3 +181,31 @@ def getDarwinTestableFunctions(objectFileName):
     external.sort()
     internal.sort()
     return { "Local": internal, "Global" : external }
+
+def getElfTestableFunctions(objectFileName):
+    '''
+    Retrieve a set of local and global function names within an ELF file, reading its symbol table directly.
+    '''
+    external = []
+    internal = []
+    for symbol in ELF.getSymbols(objectFileName):
+        if symbol["type"] == "function" and symbol["section"] == "text":
+            functionName = symbol["name"]
+            if not isReservedName(functionName):
+                if symbol["binding"] == "local":
+                    internal.append(functionName)
+                else:
+                    external.append(functionName)
+
+    external.sort()
+    internal.sort()
+    return { "Local": internal, "Global" : external }
+
+def getTestableFunctions(objectFileName):
+    '''
+    Retrieve a set of local and global function names within an object file,
+    using the native ELF reader for ELF files and nm(1) otherwise.
+    '''
+    if ELF.isELF(objectFileName):
+        return getElfTestableFunctions(objectFileName)
+    return getDarwinTestableFunctions(objectFileName)
@@ -59,8 +59,13 @@ import subprocess
 import re
 import sys
 import pprint
+import multiprocessing.pool
+import json
+import array
 import FileUtil
 import Language_C
+import GCovData
+import ArtifactIndex
 
 class GCov:
     def __init__(self):
@@ -84,31 +89,88 @@ def canonicalizeLines(lines):
             accumulatedLine = accumulatedLine + " " + line
     return result
 
-def executeGCovCommand(testExecutableFileName):
-    currentDirectory = os.getcwd()
+def findGCovFiles(testExecutableFileName):
+    '''
+    Find the object directory, .gcda and .gcno files for the test executable.
+
+    Returns a tuple of the absolute path of the directory containing the test executable,
+    and the object directory, .gcda and .gcno file names relative to that directory,
+    or None if any of them cannot be found.
+    '''
     targetDirectory = os.path.dirname(os.path.abspath(testExecutableFileName))
     testExecutableBaseName = os.path.basename(testExecutableFileName)
+    artifactIndex = ArtifactIndex.getArtifactIndex()
+
+    relativePath = lambda path: os.path.join(".", os.path.relpath(path, targetDirectory))
 
-    os.chdir(targetDirectory)
-    objects = Language_C.findFiles("./", testExecutableBaseName+"*.o")
+    objects = artifactIndex.findFiles(targetDirectory, testExecutableBaseName, ".o")
     if not objects:
-        return
-    objdir = os.path.dirname(objects[0])
-    gcdas = Language_C.findFiles("./", testExecutableBaseName+"*.gcda")
+        return None
+    objdir = os.path.dirname(relativePath(objects[0]))
+    gcdas = artifactIndex.findFiles(targetDirectory, testExecutableBaseName, ".gcda")
     if not gcdas:
-        return
-    gcda = gcdas[0]
-    gcnos = Language_C.findFiles("./", testExecutableBaseName+"*.gcno")
+        return None
+    gcda = relativePath(gcdas[0])
+    gcnos = artifactIndex.findFiles(targetDirectory, testExecutableBaseName, ".gcno")
     if not gcnos:
+        return None
+    gcno = relativePath(gcnos[0])
+
+    return (targetDirectory, objdir, gcda, gcno)
+
+def executeGCovCommand(testExecutableFileName, longFileNames=False):
+    '''
+    Run gcov for the test executable, returning the canonicalized lines of its output.
+
+    gcov is run in the directory containing the test executable (without changing the current directory of this process),
+    which is where it writes the .gcov files.
+    If longFileNames is True, gcov prefixes each .gcov file name with the name of the test executable,
+    so several gcov processes can run concurrently in the same directory without overwriting each other's .gcov files.
+    '''
+    gcovFiles = findGCovFiles(testExecutableFileName)
+    if gcovFiles is None:
         return
-    gcno = gcnos[0]
-    proc = subprocess.Popen(['gcov', '-af', '-o='+objdir, '-gcda='+gcda, '-gcno='+gcno, testExecutableBaseName], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    os.chdir(currentDirectory)
+    targetDirectory, objdir, gcda, gcno = gcovFiles
+    testExecutableBaseName = os.path.basename(testExecutableFileName)
 
-    inputLines = map(lambda line: line.strip(), proc.stdout)
+    options = '-af'
+    if longFileNames:
+        options = options + 'l'
+    proc = subprocess.Popen(['gcov', options, '-o='+objdir, '-gcda='+gcda, '-gcno='+gcno, testExecutableBaseName],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=targetDirectory)
+    output, errors = proc.communicate()
+
+    inputLines = map(lambda line: line.strip(), output.splitlines())
 
     return canonicalizeLines(inputLines)
 
+def executeGCovJSONCommand(testExecutableFileName):
+    '''
+    Run gcov for the test executable in its JSON intermediate format,
+    generating each JSON document gcov writes to its standard output as soon as it has been read.
+
+    Nothing is written to the file system.
+    The JSON intermediate format is only produced by GNU gcov (version 9 or later, --stdout requires version 10),
+    which finds the .gcno file next to the .gcda file named on its command line.
+    '''
+    gcovFiles = findGCovFiles(testExecutableFileName)
+    if gcovFiles is None:
+        return
+    targetDirectory, objdir, gcda, gcno = gcovFiles
+
+    devnull = open(os.devnull, "w")
+    proc = subprocess.Popen(['gcov', '--json-format', '--stdout', gcda],
+                            stdout=subprocess.PIPE, stderr=devnull, cwd=targetDirectory)
+    try:
+        # gcov writes each JSON document on a single line.
+        for line in iter(proc.stdout.readline, ""):
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        devnull.close()
+
 def parseFunctionLine(line):
     # Function 'TestFixture_Global_TearDown' Lines executed:71.43% of 7"
     search = re.search("Function '(.*)' Lines executed:(.*)% of (.*)", line, re.IGNORECASE)
@@ -146,10 +208,64 @@ def parseCreatingLine(testExecutableDirectoryName, line):
         baseName = os.path.basename(search.group(2));
         gcovFileName = os.path.abspath(testExecutableDirectoryName + "/" + baseName)
 
-    result = { "fileName" : fileName, "gcovFileName" : gcovFileName, "gcovLines" : FileUtil.readFileLines(gcovFileName) }
+    with open(gcovFileName) as gcovFile:
+        (lineCounts, unexecutedBlockLines) = computeLineCoverageFromGCovLines(gcovFile)
+    result = { "fileName" : fileName, "gcovFileName" : gcovFileName, "lineCounts" : lineCounts, "unexecutedBlockLines" : unexecutedBlockLines }
 
     return result
 
+def computeLineSet(lineNumbers):
+    '''
+    A bitset, a Python integer in which bit n is set for line n, of the given line numbers.
+    '''
+    lineNumbers = list(lineNumbers)
+    if not lineNumbers:
+        return 0
+    bits = bytearray("0" * (max(lineNumbers) + 1))
+    for lineNumber in lineNumbers:
+        bits[lineNumber] = ord("1")
+    return int(str(bits[::-1]), 2)
+
+def computeLineCoverageFromGCovLines(gcovLines):
+    '''
+    Read the lines of a .gcov file, each of which is the count, the line number and the source line separated by colons,
+    one at a time, returning the tuple (lineCounts, unexecutedBlockLines).
+
+    'lineCounts' is the same array of execution counts as computeLineCounts produces:
+    a count of "-" is a line that is not executable, and "#####" or "=====" a line that was never executed.
+    'unexecutedBlockLines' is the bitset of the lines that were executed but have a block that was not,
+    which gcov marks by following the count with "*".
+    '''
+    lineCounts = array.array('l')
+    unexecutedBlocks = []
+    for gcovLine in gcovLines:
+        token = gcovLine.split(":", 2)
+        if len(token) < 3:
+            continue
+        try:
+            lineNumber = int(token[1])
+        except ValueError:
+            continue
+        if lineNumber == 0:
+            continue
+
+        count = token[0].strip()
+        if count.endswith("*"):
+            unexecutedBlocks.append(lineNumber)
+            count = count.rstrip("*")
+
+        if count == "-":
+            count = -1
+        elif count.isdigit():
+            count = int(count)
+        else:
+            count = 0
+
+        if lineNumber >= len(lineCounts):
+            lineCounts.extend([-1] * (lineNumber + 1 - len(lineCounts)))
+        lineCounts[lineNumber] = count
+    return (lineCounts, computeLineSet(unexecutedBlocks))
+
 
 def computeCoverageFromGCovLines(testExecutableDirectoryName, testExecutableFileName, lines):
     '''
@@ -158,10 +274,15 @@ def computeCoverageFromGCovLines(testExecutableDirectoryName, testExecutableFile
     'testedFiles' : dictionary containing as keys 'functions' and the name of a file that was tested
 
     The value of the key that is the name of a file that was tested is a dictionary containing the keys,
-    'coverage', 'gcovFileName', and 'gcovLines'
+    'coverage', 'totalLines', 'gcovFileName', 'lineCounts' and 'unexecutedBlockLines'
 
     'coverage' is the percentage of code executed
 
+    'lineCounts' is an array indexed by line number of the number of times each line was executed, or -1 if the line is not executable.
+
+    'unexecutedBlockLines' is a bitset, a Python integer in which bit n is set for line n,
+    of the lines that were executed but contain a block that was not.
+
     'testedFunctions' is a list containing lists consisting of the function name, the percent executed, and the number of lines in the function.
     '''
     testedFiles = { }
@@ -187,23 +308,184 @@ def computeCoverageFromGCovLines(testExecutableDirectoryName, testExecutableFile
     return result
 
 
+def computePercentage(executed, total):
+    '''
+    The percentage of total that was executed, rounded to two places as gcov reports it.
+    '''
+    if total == 0:
+        return 0.0
+    return round(100.0 * executed / total, 2)
+
+def computeLineCounts(jsonLines):
+    '''
+    Build a compact array of execution counts, indexed by line number, from the "lines" of a gcov JSON file entry.
+
+    Lines that are not executable have the count -1.
+    '''
+    numberOfLines = max(map(lambda line: line["line_number"], jsonLines)) + 1 if jsonLines else 0
+    lineCounts = array.array('l', [-1]) * numberOfLines
+    for line in jsonLines:
+        lineNumber = line["line_number"]
+        lineCounts[lineNumber] = max(lineCounts[lineNumber], line["count"])
+    return lineCounts
+
+def computeFunctionCoverageFromGCovJSON(jsonFile):
+    '''
+    Produce the 'testedFunctions' dictionary for the functions of a gcov JSON file entry.
+    '''
+    functionLines = { }
+    for line in jsonFile["lines"]:
+        if "function_name" in line:
+            functionLines.setdefault(line["function_name"], []).append(line["count"])
+
+    result = { }
+    for function in jsonFile["functions"]:
+        if function["name"] in functionLines:
+            counts = functionLines[function["name"]]
+        else:
+            # gcov before version 10 does not name the function of each line.
+            counts = map(lambda line: line["count"],
+                         filter(lambda line: function["start_line"] <= line["line_number"] <= function["end_line"], jsonFile["lines"]))
+        executed = len(filter(lambda count: count > 0, counts))
+        result[function["name"].encode("utf-8")] = { "coverage" : computePercentage(executed, len(counts)), "numberOfLines" : len(counts) }
+
+    return result
+
+def computeCoverageFromGCovJSON(testExecutableDirectoryName, testExecutableFileName, jsonDocuments):
+    '''
+    Produce the same dictionary as computeCoverageFromGCovLines from the documents of gcov's JSON intermediate format.
+
+    The tested files have no 'gcovFileName'.
+
+    Each document is reduced to its compact form as soon as it is decoded, so only one document is held at a time.
+    '''
+    testedFiles = { }
+    testedFunctions = { }
+    for document in jsonDocuments:
+        for jsonFile in document["files"]:
+            lineCounts = computeLineCounts(jsonFile["lines"])
+            totalLines = len(filter(lambda count: count >= 0, lineCounts))
+            if totalLines == 0:
+                continue
+            executedLines = len(filter(lambda count: count > 0, lineCounts))
+
+            baseName = os.path.basename(jsonFile["file"].encode("utf-8"))
+            fileName = os.path.abspath(testExecutableDirectoryName + "/" + baseName)
+            unexecutedBlockLines = computeLineSet(map(lambda line: line["line_number"],
+                                                      filter(lambda line: line["count"] > 0 and line.get("unexecuted_block"), jsonFile["lines"])))
+            testedFiles[fileName] = { "coverage" : computePercentage(executedLines, totalLines), "totalLines" : totalLines,
+                                      "lineCounts" : lineCounts, "unexecutedBlockLines" : unexecutedBlockLines }
+            testedFunctions.update(computeFunctionCoverageFromGCovJSON(jsonFile))
+
+    result = { testExecutableFileName : { "testedFunctions" : testedFunctions, "testedFiles" : testedFiles } }
+
+    return result
+
+
 def noCoverage():
     result = { "testedFiles" : { }, "testedFunctions" : { } }
     return result
 
-def getCoverage(testExecutableFileName):
+# If not None, the CoverageStore.CoverageStore used to remember coverage between invocations.
+coverageStore = None
+
+def setCoverageStore(store):
+    global coverageStore
+    coverageStore = store
+    return
+
+def computeCoverage(testExecutableFileName, longFileNames=False, backend="text"):
     '''
+    Compute the coverage of the test executable.
+
+    The backend is "text", which parses gcov's human readable output and the .gcov files it writes,
+    "json", which decodes gcov's JSON intermediate format from its standard output,
+    or "native", which reads the .gcno and .gcda files itself without running gcov,
+    falling back to "text" for files written by versions of GCC it does not understand.
     '''
     if testExecutableFileName == None:
         return None
 
     testExecutableFileName = os.path.abspath(testExecutableFileName)
     testExecutableDirectoryName = os.path.dirname(testExecutableFileName)
-    gcovLines = executeGCovCommand(testExecutableFileName)
+
+    if backend == "json":
+        jsonDocuments = executeGCovJSONCommand(testExecutableFileName)
+        return computeCoverageFromGCovJSON(testExecutableDirectoryName, testExecutableFileName, jsonDocuments)
+
+    if backend == "native":
+        gcovFiles = findGCovFiles(testExecutableFileName)
+        if gcovFiles is None:
+            return computeCoverageFromGCovJSON(testExecutableDirectoryName, testExecutableFileName, [])
+        targetDirectory, objdir, gcda, gcno = gcovFiles
+        try:
+            document = GCovData.getCoverage(os.path.join(targetDirectory, gcno), os.path.join(targetDirectory, gcda))
+            return computeCoverageFromGCovJSON(testExecutableDirectoryName, testExecutableFileName, [document])
+        except GCovData.GCovDataError:
+            # Files this reader does not understand are left to gcov.
+            pass
+
+    gcovLines = executeGCovCommand(testExecutableFileName, longFileNames)
 
     return computeCoverageFromGCovLines(testExecutableDirectoryName, testExecutableFileName, gcovLines)
 
 
+def getCoverage(testExecutableFileName, longFileNames=False, backend="text"):
+    '''
+    Get the coverage of the test executable, using the coverage store if there is one.  See computeCoverage.
+
+    The coverage is only computed if it is not in the store,
+    or the test executable's .gcda or .gcno file has changed since it was stored.
+    '''
+    if coverageStore is None or testExecutableFileName == None:
+        return computeCoverage(testExecutableFileName, longFileNames, backend)
+
+    testExecutableFileName = os.path.abspath(testExecutableFileName)
+    gcovFiles = findGCovFiles(testExecutableFileName)
+    if gcovFiles is None:
+        return computeCoverage(testExecutableFileName, longFileNames, backend)
+    targetDirectory, objdir, gcda, gcno = gcovFiles
+
+    stamp = coverageStore.computeStamp(os.path.normpath(os.path.join(targetDirectory, gcda)),
+                                       os.path.normpath(os.path.join(targetDirectory, gcno)))
+    result = coverageStore.get(testExecutableFileName, backend, stamp)
+    if result is None:
+        result = computeCoverage(testExecutableFileName, longFileNames, backend)
+        # An empty result is more likely a failure to run gcov than a test that executed nothing, so it is not kept.
+        if stamp is not None and result[testExecutableFileName]["testedFiles"]:
+            coverageStore.put(testExecutableFileName, backend, stamp, result)
+
+    return result
+
+
+def getCoverages(testExecutableFileNames, jobs=1, backend="text"):
+    '''
+    Get the coverage of each of the test executables, returning a list in the same order as testExecutableFileNames.
+
+    If jobs is greater than 1, up to jobs gcov processes are run concurrently.
+    Each test executable is only analysed once however many times it is named,
+    as concurrent gcov processes for the same test executable would write and read the same .gcov files.
+    '''
+    if jobs <= 1 or len(testExecutableFileNames) < 2:
+        return map(lambda testExecutableFileName: getCoverage(testExecutableFileName, backend=backend), testExecutableFileNames)
+
+    uniqueFileNames = []
+    for testExecutableFileName in testExecutableFileNames:
+        if testExecutableFileName is not None and not os.path.abspath(testExecutableFileName) in uniqueFileNames:
+            uniqueFileNames.append(os.path.abspath(testExecutableFileName))
+
+    pool = multiprocessing.pool.ThreadPool(max(1, min(jobs, len(uniqueFileNames))))
+    try:
+        coverages = pool.map(lambda testExecutableFileName: getCoverage(testExecutableFileName, True, backend), uniqueFileNames, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+    coverageByName = dict(zip(uniqueFileNames, coverages))
+    return map(lambda testExecutableFileName: None if testExecutableFileName is None else coverageByName[os.path.abspath(testExecutableFileName)],
+               testExecutableFileNames)
+
+
 def selectGreaterCoverage(testedFileA, testedFileB):
     result = testedFileB
     if testedFileA["coverage"] >= testedFileB["coverage"]:
@@ -211,36 +493,107 @@ def selectGreaterCoverage(testedFileA, testedFileB):
 
     return result
 
+def selectCoverage(testedFiles):
+    '''
+    Choose the coverage of one file from the coverage reported by each test executable,
+    given as a list of tuples of the tested file and whether the test executable is the file's own test.
+
+    The file's own test is chosen unless a later test executable reported greater coverage.
+    '''
+    result = None
+    for (testedFile, direct) in testedFiles:
+        if direct:
+            result = dict(testedFile)
+            result["direct"] = "direct"
+        elif result is not None:
+            bestCoverage = selectGreaterCoverage(testedFile, result)
+            if result != bestCoverage:
+                result = dict(bestCoverage)
+                result["direct"] = "indirect"
+        else:
+            result = dict(testedFile)
+            result["direct"] = "indirect"
+
+    return result
+
+def getLineSets(testedFile):
+    '''
+    The executable and the executed lines of a tested file as a tuple of bitsets,
+    Python integers in which bit n is set for line n, computed once from its 'lineCounts'.
+    '''
+    if not "lineSets" in testedFile:
+        lineCounts = testedFile["lineCounts"]
+        executable = int("0" + "".join(map(lambda count: "0" if count < 0 else "1", reversed(lineCounts))), 2)
+        executed = int("0" + "".join(map(lambda count: "1" if count > 0 else "0", reversed(lineCounts))), 2)
+        testedFile["lineSets"] = (executable, executed)
+
+    return testedFile["lineSets"]
+
+def countLines(lineSet):
+    return bin(lineSet).count("1")
+
+def mergeCoverage(testedFiles):
+    '''
+    Merge the coverage of one file reported by each test executable into the union of the lines they executed,
+    given as a list of tuples of the tested file and whether the test executable is the file's own test.
+
+    The result has, in addition to 'coverage', 'totalLines' and 'direct',
+    the bitsets 'executableLines', 'directLines' (the lines executed by the file's own test),
+    'indirectLines' (the lines executed only by other test executables)
+    and 'unexecutedBlockLines' (the lines executed by the file's own test that contain a block some test did not execute).
+    '''
+    executableLines = 0
+    directLines = 0
+    indirectLines = 0
+    unexecutedBlockLines = 0
+    direct = "indirect"
+    for (testedFile, isDirect) in testedFiles:
+        (executable, executed) = getLineSets(testedFile)
+        executableLines |= executable
+        unexecutedBlockLines |= testedFile.get("unexecutedBlockLines", 0)
+        if isDirect:
+            directLines |= executed
+            direct = "direct"
+        else:
+            indirectLines |= executed
+    indirectLines &= ~directLines
+
+    totalLines = countLines(executableLines)
+    coverage = computePercentage(countLines(directLines | indirectLines), totalLines)
+
+    return { "coverage" : coverage, "totalLines" : totalLines, "direct" : direct,
+             "executableLines" : executableLines, "directLines" : directLines, "indirectLines" : indirectLines,
+             "unexecutedBlockLines" : unexecutedBlockLines & directLines }
+
 def computeSummary(filesAndTests, newGCovResults):
     '''
-    First, for each target file named in the gcov results, find the corresponding testedFile and report the maximum coverage.
+    For each target file named in the gcov results, merge the coverage reported for it by every test executable.
 
-    If the target file is not in any of the testedFiles
+    When every test executable reported the count of each line, the coverage is the union of the lines they executed
+    (see mergeCoverage).  Otherwise, the file's own test or the greatest coverage is chosen (see selectCoverage).
 
-    { targetFileName : { "coverage": percent, "veracity" : "direct" / "indirect" } }
+    { targetFileName : { "coverage": percent, "direct" : "direct" / "indirect" } }
     '''
 
     newGCovResults = filter(lambda entry: entry != None, newGCovResults)
 
-    result = dict()
+    coverages = dict()
     for entry in newGCovResults:
         for testExecutableName in entry:
-            testExecutableCSourceName = Language_C.Module(testExecutableName).getCSourceName()
+            testExecutableBaseName = os.path.basename(testExecutableName)
 
             for testedFileName in entry[testExecutableName]["testedFiles"]:
                 testedFile = entry[testExecutableName]["testedFiles"][testedFileName]
+                direct = Language_C.Module(testedFileName).getTestExecutableName() == testExecutableBaseName
+                coverages.setdefault(testedFileName, []).append((testedFile, direct))
 
-                if Language_C.Module(testedFileName).getTestExecutableName() == os.path.basename(testExecutableName):
-                    result[testedFileName] = testedFile
-                    result[testedFileName]["direct"] = "direct"
-                elif testedFileName in result:
-                    bestCoverage = selectGreaterCoverage(testedFile, result[testedFileName])
-                    if result[testedFileName] != bestCoverage:
-                        result[testedFileName] = bestCoverage
-                        result[testedFileName]["direct"] = "indirect"
-                else:
-                    result[testedFileName] = testedFile
-                    result[testedFileName]["direct"] = "indirect"
+    result = dict()
+    for testedFileName in coverages:
+        testedFiles = coverages[testedFileName]
+        if all(map(lambda testedFileAndDirect: "lineCounts" in testedFileAndDirect[0], testedFiles)):
+            result[testedFileName] = mergeCoverage(testedFiles)
+        else:
+            result[testedFileName] = selectCoverage(testedFiles)
 
     return result
 
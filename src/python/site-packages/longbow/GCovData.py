@@ -0,0 +1,389 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+import os
+import mmap
+import struct
+
+# A reader for the notes (.gcno) and data (.gcda) files written by GCC's -ftest-coverage and -fprofile-arcs,
+# decoding the files in place through mmap and computing line and function execution counts without running gcov(1).
+# Only the format written by GCC 12 and later is understood, in which record lengths are in bytes
+# and strings are length prefixed and not padded.
+
+GCOV_NOTE_MAGIC = 0x67636e6f   # "gcno"
+GCOV_DATA_MAGIC = 0x67636461   # "gcda"
+
+GCOV_TAG_FUNCTION = 0x01000000
+GCOV_TAG_BLOCKS = 0x01410000
+GCOV_TAG_ARCS = 0x01430000
+GCOV_TAG_LINES = 0x01450000
+GCOV_TAG_COUNTER_ARCS = 0x01a10000
+
+GCOV_ARC_ON_TREE = 1
+
+MINIMUM_MAJOR_VERSION = 12
+
+
+class GCovDataError(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+
+class _Reader:
+    '''
+    Sequential reader of the words, 64-bit counters and strings of a .gcno or .gcda file.
+    '''
+    def __init__(self, data, magic, fileName):
+        self.data = data
+        self.offset = 0
+        self.fileName = fileName
+        if len(data) < 16:
+            raise GCovDataError("Truncated file " + fileName)
+        if struct.unpack_from("<I", data, 0)[0] == magic:
+            self.endian = "<"
+        elif struct.unpack_from(">I", data, 0)[0] == magic:
+            self.endian = ">"
+        else:
+            raise GCovDataError("Bad magic number in " + fileName)
+        self.offset = 4
+
+        self.version = self.readUnsigned()
+        major = parseMajorVersion(self.version)
+        if major < MINIMUM_MAJOR_VERSION:
+            raise GCovDataError("Unsupported version %d in %s" % (major, fileName))
+
+    def atEnd(self):
+        return self.offset + 4 > len(self.data)
+
+    def readUnsigned(self):
+        result = struct.unpack_from(self.endian + "I", self.data, self.offset)[0]
+        self.offset += 4
+        return result
+
+    def readSigned(self):
+        result = struct.unpack_from(self.endian + "i", self.data, self.offset)[0]
+        self.offset += 4
+        return result
+
+    def readCounter(self):
+        (low, high) = struct.unpack_from(self.endian + "II", self.data, self.offset)
+        self.offset += 8
+        return (high << 32) | low
+
+    def readString(self):
+        length = self.readUnsigned()
+        result = self.data[self.offset:self.offset + length].rstrip("\0")
+        self.offset += length
+        return result
+
+    def records(self):
+        '''
+        Generate the tuple (tag, length) for each record, leaving the reader positioned at the start of the record.
+        The reader is moved to the end of the record before the next one is generated, whatever was read of it.
+        '''
+        while not self.atEnd():
+            tag = self.readUnsigned()
+            if tag == 0:
+                break
+            length = self.readSigned()
+            end = self.offset + max(length, 0)
+            yield (tag, length)
+            self.offset = end
+
+
+def parseMajorVersion(version):
+    '''
+    The major GCC version of a gcov version number, which is four characters such as "B22*" for GCC 12.2
+    (the first two characters are the tens and units of the major version) or "407*" for GCC 4.7.
+    '''
+    first = chr((version >> 24) & 0xff)
+    second = chr((version >> 16) & 0xff)
+    if first >= "A":
+        return (ord(first) - ord("A")) * 10 + ord(second) - ord("0")
+    return ord(first) - ord("0")
+
+
+def _mapFile(fileName):
+    with open(fileName, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise GCovDataError("Empty file " + fileName)
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def readNotes(data, fileName=""):
+    '''
+    Read the control flow graph of each function from the content of a .gcno file.
+
+    The result is a dictionary of the form:
+    { "stamp" : integer,
+      "functions" : [ { "ident" : integer, "cfgChecksum" : integer, "name" : string, "artificial" : boolean,
+                        "source" : string, "startLine" : integer, "endLine" : integer,
+                        "numberOfBlocks" : integer,
+                        "arcs" : [ (source block, destination block, flags) ],
+                        "blockLines" : { block : [ (source file name, line number) ] } } ] }
+    '''
+    reader = _Reader(data, GCOV_NOTE_MAGIC, fileName)
+    stamp = reader.readUnsigned()
+    reader.readUnsigned()           # checksum
+    reader.readString()             # current working directory of the compilation
+    reader.readUnsigned()           # supports unexecuted blocks
+
+    functions = []
+    function = None
+    for (tag, length) in reader.records():
+        if tag == GCOV_TAG_FUNCTION:
+            function = { "ident" : reader.readUnsigned() }
+            reader.readUnsigned()   # line number checksum
+            function["cfgChecksum"] = reader.readUnsigned()
+            function["name"] = reader.readString()
+            function["artificial"] = reader.readUnsigned() != 0
+            function["source"] = reader.readString()
+            function["startLine"] = reader.readUnsigned()
+            reader.readUnsigned()   # start column
+            function["endLine"] = reader.readUnsigned()
+            function["numberOfBlocks"] = 0
+            function["arcs"] = []
+            function["blockLines"] = { }
+            functions.append(function)
+        elif function is None:
+            continue
+        elif tag == GCOV_TAG_BLOCKS:
+            function["numberOfBlocks"] = reader.readUnsigned()
+        elif tag == GCOV_TAG_ARCS:
+            source = reader.readUnsigned()
+            for i in range((length - 4) / 8):
+                destination = reader.readUnsigned()
+                function["arcs"].append((source, destination, reader.readUnsigned()))
+        elif tag == GCOV_TAG_LINES:
+            block = reader.readUnsigned()
+            sourceName = function["source"]
+            lines = function["blockLines"].setdefault(block, [])
+            while True:
+                lineNumber = reader.readUnsigned()
+                if lineNumber != 0:
+                    lines.append((sourceName, lineNumber))
+                    continue
+                sourceName = reader.readString()
+                if not sourceName:
+                    break
+
+    return { "stamp" : stamp, "functions" : functions }
+
+
+def readCounts(data, fileName=""):
+    '''
+    Read the arc counters of each function from the content of a .gcda file.
+
+    The result is a dictionary of the form:
+    { "stamp" : integer, "functions" : { ident : (cfgChecksum, [ counter ]) } }
+    '''
+    reader = _Reader(data, GCOV_DATA_MAGIC, fileName)
+    stamp = reader.readUnsigned()
+    reader.readUnsigned()           # checksum
+
+    functions = { }
+    function = None
+    for (tag, length) in reader.records():
+        if tag == GCOV_TAG_FUNCTION:
+            function = None
+            if length > 0:
+                ident = reader.readUnsigned()
+                reader.readUnsigned()   # line number checksum
+                function = (ident, reader.readUnsigned())
+        elif tag == GCOV_TAG_COUNTER_ARCS and function is not None:
+            if length < 0:
+                # A negative length is the size of counters that are all zero.
+                counters = [0] * (-length / 8)
+            else:
+                counters = map(lambda i: reader.readCounter(), range(length / 8))
+            functions[function[0]] = (function[1], counters)
+
+    return { "stamp" : stamp, "functions" : functions }
+
+
+def solveFlowGraph(numberOfBlocks, arcs, counters):
+    '''
+    Compute the execution count of every block and arc of a function's control flow graph.
+
+    Only the arcs not on the spanning tree are instrumented, and counters holds their counts in the order of arcs.
+    The remaining counts follow from the flow into each block being equal to the flow out of it.
+    Returns the tuple (block counts, arc counts).  Counts that cannot be determined are zero.
+    '''
+    arcCounts = [None] * len(arcs)
+    incoming = map(lambda block: [], range(numberOfBlocks))
+    outgoing = map(lambda block: [], range(numberOfBlocks))
+    counterIndex = 0
+    for index in range(len(arcs)):
+        (source, destination, flags) = arcs[index]
+        outgoing[source].append(index)
+        incoming[destination].append(index)
+        if not flags & GCOV_ARC_ON_TREE:
+            arcCounts[index] = counters[counterIndex] if counterIndex < len(counters) else 0
+            counterIndex += 1
+
+    blockCounts = [None] * numberOfBlocks
+    changed = True
+    while changed:
+        changed = False
+        for block in range(numberOfBlocks):
+            if blockCounts[block] is None:
+                for blockArcs in (incoming[block], outgoing[block]):
+                    if blockArcs and all(map(lambda index: arcCounts[index] is not None, blockArcs)):
+                        blockCounts[block] = sum(map(lambda index: arcCounts[index], blockArcs))
+                        changed = True
+                        break
+            if blockCounts[block] is not None:
+                for blockArcs in (incoming[block], outgoing[block]):
+                    unknown = filter(lambda index: arcCounts[index] is None, blockArcs)
+                    if len(unknown) == 1:
+                        known = sum(map(lambda index: arcCounts[index] or 0, blockArcs))
+                        arcCounts[unknown[0]] = max(blockCounts[block] - known, 0)
+                        changed = True
+
+    blockCounts = map(lambda count: count or 0, blockCounts)
+    arcCounts = map(lambda count: count or 0, arcCounts)
+    return (blockCounts, arcCounts)
+
+
+def computeLineCounts(function, blockCounts, arcCounts):
+    '''
+    Compute the execution count of each line of the function, and whether any of the line's blocks was not executed,
+    as { (source file name, line number) : (count, unexecuted block) }.
+
+    As gcov does, a line's count is the number of times control entered the blocks of the line from outside the line,
+    plus the number of times a loop entirely within the line went around.
+    Rather than finding every cycle among the line's blocks as gcov does, each arc back to a block of the line
+    from a later block of the line counts as one time around a loop, which gives the same count for simple loops.
+    '''
+    lineBlocks = { }
+    for (block, lines) in function["blockLines"].items():
+        for line in lines:
+            lineBlocks.setdefault(line, set()).add(block)
+
+    incoming = { }
+    for index in range(len(function["arcs"])):
+        incoming.setdefault(function["arcs"][index][1], []).append(index)
+
+    result = { }
+    for (line, blocks) in lineBlocks.items():
+        count = 0
+        for block in blocks:
+            for index in incoming.get(block, []):
+                source = function["arcs"][index][0]
+                if not source in blocks or source >= block:
+                    count += arcCounts[index]
+        if count == 0:
+            # Control never entered the line, but its blocks may still have executed.
+            count = max(map(lambda block: blockCounts[block], blocks))
+        result[line] = (count, min(map(lambda block: blockCounts[block], blocks)) == 0)
+    return result
+
+
+def computeCoverage(notes, counts):
+    '''
+    Compute the coverage of the functions in notes, as read by readNotes, using the counts read by readCounts.
+
+    The result is a dictionary in the form of a document of gcov's JSON intermediate format,
+    containing for each source file its "functions" and the "line_number", "count", "unexecuted_block" and "function_name" of its "lines".
+    '''
+    if notes["stamp"] != counts["stamp"]:
+        raise GCovDataError("The notes and data files are from different compilations")
+
+    files = { }
+    getFile = lambda name: files.setdefault(name, { "file" : name.decode("utf-8", "replace"), "functions" : [], "lines" : [] })
+
+    for function in notes["functions"]:
+        counters = []
+        if function["ident"] in counts["functions"]:
+            (cfgChecksum, counters) = counts["functions"][function["ident"]]
+            if cfgChecksum != function["cfgChecksum"]:
+                raise GCovDataError("The data for %s does not match its control flow graph" % (function["name"]))
+
+        (blockCounts, arcCounts) = solveFlowGraph(function["numberOfBlocks"], function["arcs"], counters)
+        functionName = function["name"].decode("utf-8", "replace")
+
+        if not function["artificial"]:
+            getFile(function["source"])["functions"].append({ "name" : functionName,
+                                                               "start_line" : function["startLine"],
+                                                               "end_line" : function["endLine"],
+                                                               "execution_count" : blockCounts[0] if blockCounts else 0 })
+
+        for ((sourceName, lineNumber), (count, unexecutedBlock)) in sorted(computeLineCounts(function, blockCounts, arcCounts).items()):
+            getFile(sourceName)["lines"].append({ "line_number" : lineNumber, "count" : count,
+                                                  "unexecuted_block" : unexecutedBlock, "function_name" : functionName })
+
+    return { "files" : files.values() }
+
+
+def getCoverage(gcnoFileName, gcdaFileName):
+    '''
+    Read the named .gcno and .gcda files and compute their coverage.  See computeCoverage.
+    '''
+    notesData = _mapFile(gcnoFileName)
+    try:
+        notes = readNotes(notesData, gcnoFileName)
+    finally:
+        notesData.close()
+
+    countsData = _mapFile(gcdaFileName)
+    try:
+        counts = readCounts(countsData, gcdaFileName)
+    finally:
+        countsData.close()
+
+    return computeCoverage(notes, counts)
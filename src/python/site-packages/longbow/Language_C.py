@@ -55,11 +55,13 @@
 # @author Glenn Scott, Palo Alto Research Center (PARC)
 # @copyright (c) 2014-2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
 import os
-import glob
+import bisect
 
 import fnmatch
 import subprocess
 
+import Archive
+
 def findFiles(startDir, pattern):
     matches = []
     for root, dirnames, filenames in os.walk(startDir):
@@ -74,23 +76,68 @@ def getLibPathForObject(libraryPath, filename):
     '''
     result = ''
 
-    command = ['/usr/bin/ar', '-t', libraryPath]
-    output = subprocess.check_output(command)
-    lines = output.splitlines()
-
-    for line in lines:
-        tokens = line.split('.')
-        if tokens[0] == filename:
-            result = libraryPath + '(' + line + ')'
-            break
+    member = Archive.getArchiveIndex(libraryPath).getMemberForStem(filename)
+    if member:
+        result = libraryPath + '(' + member["name"] + ')'
 
     return result
 
+class ObjectDirectoryIndex:
+    '''
+    An index of the files in one or more object file directories.
+    Each directory is listed once, the first time it is searched,
+    and every subsequent search of that directory is answered from the index.
+    '''
+    def __init__(self):
+        self.directories = { }
+        return
+
+    def getDirectory(self, directory):
+        '''
+        Return the tuple (names, positions) for the directory,
+        where names is the sorted list of the names of the files in the directory (excluding hidden files, as glob does)
+        and positions maps each name to its position in the directory listing.
+        '''
+        if not directory in self.directories:
+            try:
+                listing = filter(lambda name: not name.startswith("."), os.listdir(directory))
+            except OSError:
+                listing = []
+            positions = dict(map(lambda position: (listing[position], position), range(len(listing))))
+            self.directories[directory] = (sorted(listing), positions)
+        return self.directories[directory]
+
+    def findObject(self, directory, fileName):
+        '''
+        Return the first path matching the pattern directory/fileName*.o*,
+        being the same path glob.glob would have returned first, or None if there is no match.
+        '''
+        (names, positions) = self.getDirectory(directory)
+
+        result = None
+        i = bisect.bisect_left(names, fileName)
+        while i < len(names) and names[i].startswith(fileName):
+            name = names[i]
+            if ".o" in name[len(fileName):]:
+                if result is None or positions[name] < positions[result]:
+                    result = name
+            i = i + 1
+
+        if result is None:
+            return None
+        return os.path.join(directory, result)
+
+# The ObjectDirectoryIndex shared by every Module that is not given one explicitly.
+objectDirectoryIndex = ObjectDirectoryIndex()
+
+def getObjectDirectoryIndex():
+    return objectDirectoryIndex
+
 class Module:
     '''Represent a C language module.
     A module consists of the file names of the C source, C header file, object file, and an executable file
     A module can be queried for a variety of things based on the PARC file name conventions.'''
-    def __init__(self, srcPath, objectDirs=[]):
+    def __init__(self, srcPath, objectDirs=[], objectIndex=None):
         self.path = self.initialzePath(srcPath)
         if not objectDirs:
             objectDirs = [self.path]
@@ -103,6 +150,9 @@ class Module:
         if self.fileName.startswith("test_"):
             self.fileName = self.fileName[5:]
 
+        if objectIndex is None:
+            objectIndex = objectDirectoryIndex
+
         # Search for an appropriate object
         self.objectPath = "";
         for objectDir in objectDirs:
@@ -111,11 +161,10 @@ class Module:
                 if self.objectPath:
                     break
             else:
-                objectSearchPath = os.path.join(objectDir, self.fileName) + "*.o*"
-                ofiles = glob.glob(objectSearchPath);
-                if ofiles:
-                    # if we've found some matches, assume we want the first.
-                    self.objectPath = ofiles[0];
+                # if there are several matches, assume we want the first.
+                objectFile = objectIndex.findObject(objectDir, self.fileName)
+                if objectFile:
+                    self.objectPath = objectFile;
                     break
         return
 
@@ -55,6 +55,12 @@
 # @author Glenn Scott, Palo Alto Research Center (PARC)
 # @copyright (c) 2014, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
 import sys
+import atexit
+import csv
+import json
+import cStringIO
+
+import FileUtil
 
 ansiRed = "\x1b[31m";
 ansiGreen = "\x1b[32m";
@@ -62,26 +68,131 @@ ansiYellow = "\x1b[33m";
 ansiMagenta = "\x1b[35m";
 ansiReset = "\x1b[0m";
 
+_ansiColors = { "red" : ansiRed, "green" : ansiGreen, "yellow" : ansiYellow, "magenta" : ansiMagenta }
 
-def buildRed(string):
-    if sys.stdout.isatty():
-        return ansiRed + string + ansiReset
-    else:
+# The number of characters a ReportSink holds before writing them to a stream that is not a terminal.
+DEFAULT_BUFFER_SIZE = 256 * 1024
+
+
+class ReportSink:
+    '''
+    A buffered destination for the output of a report.
+
+    Whether the output is colorized is decided once, when the sink is made (by default, if the stream is a terminal).
+    Output to a pipe or file is accumulated and written to the stream in large pieces rather than a line at a time,
+    while output to a terminal is written as it is made (by default), so it appears in step with errors written to stderr.
+    A report writes plain text lines (printLine, printScore), CSV rows (printRow), or JSON-lines records (printRecord).
+    '''
+    def __init__(self, stream=None, colorize=None, bufferSize=None):
+        if stream is None:
+            stream = sys.stdout
+        isTerminal = hasattr(stream, "isatty") and stream.isatty()
+        if colorize is None:
+            colorize = isTerminal
+        if bufferSize is None:
+            bufferSize = 0 if isTerminal else DEFAULT_BUFFER_SIZE
+        self.stream = stream
+        self.colorize = colorize
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.bufferedSize = 0
+        return
+
+    def write(self, string):
+        '''
+        Write the string as it is, so the sink can be used in place of a file.
+        '''
+        self.buffer.append(string)
+        self.bufferedSize = self.bufferedSize + len(string)
+        if self.bufferedSize >= self.bufferSize:
+            self.flush()
+        return
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write("".join(self.buffer))
+            self.buffer = []
+            self.bufferedSize = 0
+        self.stream.flush()
+        return
+
+    def buildColor(self, color, string):
+        if self.colorize and color in _ansiColors:
+            return _ansiColors[color] + string + ansiReset
         return string
 
+    def printLine(self, string="", color=None):
+        self.write(self.buildColor(color, string) + "\n")
+        return
+
+    def printScore(self, distribution, value, string):
+        self.printLine(string, score(distribution, value))
+        return
+
+    def printRow(self, values):
+        '''
+        Write the values as a row of CSV.
+        '''
+        row = cStringIO.StringIO()
+        csv.writer(row, lineterminator="\n").writerow(values)
+        self.write(row.getvalue())
+        return
+
+    def printRecord(self, record):
+        '''
+        Write the dictionary as one line of JSON.
+        '''
+        self.write(json.dumps(record, sort_keys=True) + "\n")
+        return
+
+# The ReportSink for standard output, shared by every report and written out when the process exits.
+_reportSink = None
+
+def getReportSink():
+    global _reportSink
+    if _reportSink is None:
+        _reportSink = ReportSink()
+        atexit.register(_reportSink.flush)
+    return _reportSink
+
+
+def makeRecord(tool, fileName, metric, value, score=None, function=None, **details):
+    '''
+    Make a report record, the common form of every measurement made by the report tools,
+    which each of them writes as one line of JSON with --output json:
+
+    { "tool" : the report, eg. "style" or "coverage",
+      "file" : the file measured, or None for a measurement of all files,
+      "function" : the function measured, or None for a measurement of a whole file,
+      "metric" : what was measured, eg. "nonCompliantLines" or "coverage",
+      "value" : the measurement,
+      "score" : the score from 0 to 100 the measurement earned, or None if it is not scored }
+
+    A tool may add further keys (details) that are particular to the metric.
+    The text and CSV output of a tool are views of the same records.
+    '''
+    result = { "tool" : tool, "file" : fileName, "function" : function, "metric" : metric, "value" : value, "score" : score }
+    result.update(details)
+    return result
+
+
+def printRecords(records):
+    sink = getReportSink()
+    for record in records:
+        sink.printRecord(record)
+    return
+
+
+def buildRed(string):
+    return getReportSink().buildColor("red", string)
+
 
 def buildGreen(string):
-    if sys.stdout.isatty():
-        return ansiGreen + string + ansiReset
-    else:
-        return string
+    return getReportSink().buildColor("green", string)
 
 
 def buildYellow(string):
-    if sys.stdout.isatty():
-        return ansiYellow + string + ansiReset
-    else:
-        return string
+    return getReportSink().buildColor("yellow", string)
 
 
 def score(distribution, score):
@@ -110,15 +221,16 @@ def scoreBuilder(distribution, score, string):
 
 
 def scorePrinter(distribution, score, string):
-    print scoreBuilder(distribution, score, string)
+    getReportSink().printScore(distribution, score, string)
 
 
 def countLines(fileName):
-    i = 0
-    with open(fileName) as f:
-        for i, l in enumerate(f):
-            pass
-    return i + 1
+    contents = FileUtil.readFileString(fileName)
+    result = contents.count("\n")
+    if not contents.endswith("\n"):
+        # The last line has no newline, or the file is empty.
+        result = result + 1
+    return result
 
 
 def CFileNameToFunctionPrefix(fileName):
@@ -63,6 +63,7 @@ import csv
 import traceback
 
 import LongBow
+import CDeclarations
 from Language_C import Module
 from FileUtil import *
 from pprint import pprint
@@ -113,6 +114,18 @@ def tuplesListToPrettyText(points, distribution = [99, 90]):
         lines.append(LongBow.scoreBuilder(distribution, point[-1], line))
     return lines
 
+def pointToRecord(fileName, point):
+    '''
+    Convert a data point -- (topic, name, [reason,] score) -- to a report record (see LongBow.makeRecord).
+    '''
+    details = { "name" : point[1] }
+    if len(point) > 3:
+        details["reason"] = point[2]
+    function = None
+    if point[0] == "function-name":
+        function = point[1]
+    return LongBow.makeRecord("name", fileName, point[0], point[-1], point[-1], function, **details)
+
 def writeListToStream(llist, fileHandle, appendNewLine = True):
     '''
     Write the list of lines to the given file stream handle, appending a new line after
@@ -193,63 +206,28 @@ def isValidEnumName(typePrefix, name, values, static):
 
 def getTypedefs(path, source):
     '''
-    Retrieve the names of typedefs (excluding enums) in a given file by parsing the file for
-    typedef specifications. This walks over every line in the file searching for each one,
-    since we cannot extract enum names nicely using linux tools.
+    Retrieve the names of the struct and union typedefs in a given file.
+    The file is scanned once by CDeclarations and the result is shared with the other conformance containers.
     '''
     typedefs = []
-    pathToFile = os.path.join(path, source)
-    if os.path.isfile(pathToFile):
-        fin = open(os.path.join(path, source), 'r')
-        lines = fin.readlines()
-        i = 0 # LC
-        while (i < len(lines)):
-            line = lines[i].strip()
-            if not line.startswith("//"):
-                values = []
-                if "typedef" in line and "enum" not in line: # go to the end of the typedef
-                    if "{" in line:
-                        while "}" not in line:
-                            i = i + 1
-                            line = lines[i].strip()
-                        name = line.replace("}","").replace(";","").strip()
-                        typedefs.append(name)
-                    else:
-                        splits = line.split(" ")
-                        if "struct" in splits[1]:
-                            name = splits[3].replace(";","")
-                            typedefs.append(name.strip())
-                        else:
-                            pass
-            i = i + 1
+    declarations = CDeclarations.getDeclarations(os.path.join(path, source))
+    if declarations != None:
+        for typedef in declarations["typedefs"]:
+            if typedef["kind"] in ["struct", "union"]:
+                typedefs.append(typedef["name"])
     return typedefs
 
 def getEnumerations(path, source):
     '''
-    Retrieve the names of enumerations in a given file by parsing the file for enum specifications.
-    This walks over every line in the file searching for enums, since we cannot extract enum names
-    nicely using linux tools.
+    Retrieve the names and enumeration constant names of the typedef enumerations in a given file.
+    The file is scanned once by CDeclarations and the result is shared with the other conformance containers.
     '''
     enums = []
-    pathToFile = os.path.join(path, source)
-    if os.path.isfile(pathToFile):
-        fin = open(os.path.join(path, source), 'r')
-        lines = fin.readlines()
-        i = 0 # LC
-        while (i < len(lines)):
-            line = lines[i].strip()
-            if not line.startswith("//"):
-                values = []
-                if "typedef enum" in line: # go to the end of the enumeration
-                    while (i + 1 < len(lines) and line.find("}") < 0):
-                        i = i + 1
-                        line = lines[i].strip()
-                        values.append(line) # append each string value
-                    if (line.find("}") >= 0):
-                        name = line.replace("}","").replace(";","")
-                        values.pop(len(values) - 1)
-                        enums.append((name.strip(), values))
-            i = i + 1
+    declarations = CDeclarations.getDeclarations(os.path.join(path, source))
+    if declarations != None:
+        for enum in declarations["enums"]:
+            if enum["typedef"]:
+                enums.append((enum["name"], enum["values"]))
     return enums
 
 def getTypedefsFromFiles(fileInfoList):
@@ -307,7 +285,7 @@ class FunctionConformanceContainer():
             raise NoObjectFileException("You must compile " + str(sourceFileName) + " to generate a corresponding object or provide a special object file path")
 
         try:
-            functionDictionary = getDarwinTestableFunctions(objectFileName)
+            functionDictionary = getTestableFunctions(objectFileName)
         except:
             raise Exception("You must compile " + str(sourceFileName) + " to generate a corresponding object or provide a special object file path")
 
@@ -394,6 +372,13 @@ class FunctionConformanceContainer():
         line = [(self.getType(), self.percentage)]
         return tuplesListToPrettyText(line, distribution)
 
+    def totalRecords(self):
+        return map(lambda point : pointToRecord(self.fullPath, point), self.points)
+
+    def summaryRecords(self):
+        conformanceType, percentage = self.getScore()
+        return [LongBow.makeRecord("name", self.fullPath, conformanceType, percentage, percentage)]
+
     def getScore(self):
         return (self.getType(), self.percentage)
 
@@ -484,6 +469,13 @@ class EnumConformanceContainer():
         line = [(self.getType(), self.enumPercentage)]
         return tuplesListToPrettyText(line, distribution)
 
+    def totalRecords(self):
+        return map(lambda point : pointToRecord(self.fullPath, point), self.points)
+
+    def summaryRecords(self):
+        conformanceType, percentage = self.getScore()
+        return [LongBow.makeRecord("name", self.fullPath, conformanceType, percentage, percentage)]
+
     def getScore(self):
         return (self.getType(), self.enumPercentage)
 
@@ -573,6 +565,13 @@ class TypedefConformanceContainer():
         line = [(self.getType(), self.typedefPercentage)]
         return tuplesListToPrettyText(line, distribution)
 
+    def totalRecords(self):
+        return map(lambda point : pointToRecord(self.fullPath, point), self.points)
+
+    def summaryRecords(self):
+        conformanceType, percentage = self.getScore()
+        return [LongBow.makeRecord("name", self.fullPath, conformanceType, percentage, percentage)]
+
     def getScore(self):
         return (self.getType(), self.typedefPercentage)
 
@@ -640,6 +639,18 @@ class ModuleConformanceContainer():
             singleTuple = singleTuple + [csvGroup[-1]]
         return tuplesListToCSV([tuple(singleTuple)])
 
+    def totalRecords(self):
+        records = []
+        for container in self.conformanceContainers:
+            records = records + container.totalRecords()
+        return records
+
+    def summaryRecords(self):
+        records = []
+        for container in self.conformanceContainers:
+            records = records + container.summaryRecords()
+        return records
+
     def summaryText(self, distribution, divider=' '):
         formattedLine = self.fullPath
         for container in self.conformanceContainers:
@@ -700,6 +711,13 @@ class ModuleSetConformanceContainer():
             collatedTuple.append(self.typeConformancePercentages[conformanceType]) # append percentage
         return tuplesListToCSV([tuple(collatedTuple)])
 
+    def summaryRecords(self):
+        records = []
+        for conformanceType in self.typeConformancePercentages:
+            percentage = self.typeConformancePercentages[conformanceType]
+            records.append(LongBow.makeRecord("name", None, conformanceType, percentage, percentage))
+        return records
+
     def summaryText(self, distribution):
         formattedLine = "average-scores"
         for conformanceType in self.typeConformancePercentages:
@@ -749,7 +767,7 @@ def getConformanceHeaders():
 
 def gradeAndPrint(targets, objectDirs, problemsOnly=False, printPrefix=""):
     if len(targets) < 1:
-        print "No Files To Grade"
+        LongBow.getReportSink().printLine("No Files To Grade")
         return
 
     distribution = [99, 90]
@@ -761,7 +779,7 @@ def gradeAndPrint(targets, objectDirs, problemsOnly=False, printPrefix=""):
     nformat = pformat
     for header in headers:
         nformat = nformat + '{:>15}'
-    print nformat.format('File Name', *headers, prefix=printPrefix, maxFileNameLength=maxFileNameLength)
+    LongBow.getReportSink().printLine(nformat.format('File Name', *headers, prefix=printPrefix, maxFileNameLength=maxFileNameLength))
 
 
     for target in targets:
@@ -796,12 +814,12 @@ def gradeAndPrint(targets, objectDirs, problemsOnly=False, printPrefix=""):
         except NoObjectFileException as e:
             eformat = pformat + "Could Not Grade: No .o file found for file"
             line =  eformat.format(target, prefix=printPrefix, maxFileNameLength=maxFileNameLength, msg=e)
-            print LongBow.buildRed(line)
+            LongBow.getReportSink().printLine(line, "red")
             pass
         except Exception as e:
             eformat = pformat + "Could Not Grade: {msg}"
             line =  eformat.format(target, prefix=printPrefix, maxFileNameLength=maxFileNameLength, msg=e)
-            print LongBow.buildRed(line)
+            LongBow.getReportSink().printLine(line, "red")
             pass
     moduleConformanceSet.analyzeConformance()
 
@@ -832,27 +850,33 @@ def commandLineMain(args, targets, objectDir):
 
                 if summary:
                     if args.output == "text":
-                        writeListToStream(moduleConformance.summaryText(distribution), sys.stdout)
+                        writeListToStream(moduleConformance.summaryText(distribution), LongBow.getReportSink())
+                    elif args.output == "json":
+                        LongBow.printRecords(moduleConformance.summaryRecords())
                     else:
-                        writeListToStream(moduleConformance.summaryCSV(), sys.stdout)
+                        writeListToStream(moduleConformance.summaryCSV(), LongBow.getReportSink())
 
                 if finegrain:
                     if args.output == "text":
-                        writeListToStream(moduleConformance.totalText(distribution), sys.stdout)
+                        writeListToStream(moduleConformance.totalText(distribution), LongBow.getReportSink())
+                    elif args.output == "json":
+                        LongBow.printRecords(moduleConformance.totalRecords())
                     else:
-                        writeListToStream(moduleConformance.totalCSV(), sys.stdout)
+                        writeListToStream(moduleConformance.totalCSV(), LongBow.getReportSink())
 
         except Exception as e:
             tb = traceback.format_exc()
             print >> sys.stderr, "Error: can't analyze conformance of " + os.path.join(path, prefix) + ": " + str(e)
         finally:
             if tb != None and args.trace:
-                print tb
+                LongBow.getReportSink().printLine(tb)
         pass
 
     moduleConformanceSet.analyzeConformance()
     if average:
         if args.output == "text":
-            writeListToStream(moduleConformanceSet.summaryText(distribution), sys.stdout)
+            writeListToStream(moduleConformanceSet.summaryText(distribution), LongBow.getReportSink())
+        elif args.output == "json":
+            LongBow.printRecords(moduleConformanceSet.summaryRecords())
         else:
-            writeListToStream(moduleConformanceSet.summaryCSV(), sys.stdout)
+            writeListToStream(moduleConformanceSet.summaryCSV(), LongBow.getReportSink())
@@ -0,0 +1,320 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import sys
+import os
+import traceback
+
+import LongBow
+import FileUtil
+import ArtifactIndex
+import CoverageStore
+import GCov
+import GCovSummary
+import CoverageReport
+import StyleReport
+import NameReport
+import DoxygenReport
+import VocabularyReport
+import Language_C
+try:
+    import hfcca
+except ImportError:
+    hfcca = None
+
+# The graders, in the order of the columns of the scorecard.
+GRADERS = [ "style", "name", "coverage", "documentation", "vocabulary" ]
+
+SOURCE_EXTENSIONS = (".c", ".h")
+
+
+def findTargets(roots):
+    '''
+    Return the C source and header files named by roots, each of which is a file or a directory.
+
+    Each directory tree is walked once.
+    The same walk indexes the object and coverage files in the tree (see ArtifactIndex),
+    so the graders that look for build artifacts do not walk the tree again.
+    '''
+    result = []
+    artifactIndex = ArtifactIndex.getArtifactIndex()
+    for root in roots:
+        if not os.path.isdir(root):
+            result.append(root)
+            continue
+
+        sources = []
+        def visit(directory, fileNames):
+            for fileName in fileNames:
+                if fileName.endswith(SOURCE_EXTENSIONS):
+                    sources.append(os.path.join(directory, fileName))
+        absoluteRoot = os.path.abspath(root)
+        artifactIndex.addTree(absoluteRoot, artifactIndex.walkTree(absoluteRoot, visit))
+
+        result = result + map(lambda source: os.path.relpath(source), sorted(sources))
+    return result
+
+
+def isGradedModule(fileName):
+    '''
+    The graders of whole modules (names and coverage) grade C source files other than test sources.
+    '''
+    module = Language_C.Module(fileName)
+    return module.isCSourceName() and not module.isTestSourceName()
+
+
+def refile(records, fileName):
+    '''
+    Report the records as measurements of the named target file, whatever name the grader gave it.
+    '''
+    for record in records:
+        record["file"] = fileName
+    return records
+
+
+def gradeStyle(args, targets):
+    # StyleReport exits on a file it cannot read, so those are reported and skipped here first.
+    # Each file read is kept by the source cache for StyleReport to read again.
+    readableTargets = []
+    for target in targets:
+        try:
+            FileUtil.readFileString(target)
+            readableTargets.append(target)
+        except IOError as e:
+            print >> sys.stderr, "style: can't read %s: %s" % (target, e)
+
+    complianceList = StyleReport.checkTargets(readableTargets, args.exemplarCommand, args.exemplarConfig, args.jobs, args.batch)
+    return map(lambda compliance: StyleReport.complianceRecord(compliance.report()), complianceList)
+
+
+def gradeName(args, targets):
+    result = []
+    # Without an object path, each module's object file is found beside its source file.
+    objectDirs = []
+    if args.opath:
+        objectDirs.append(args.opath)
+    for target in filter(isGradedModule, targets):
+        try:
+            moduleConformance = NameReport.computeModuleConformance(Language_C.Module(target, objectDirs))
+            if moduleConformance.processModule():
+                result = result + refile(moduleConformance.summaryRecords(), target)
+        except Exception as e:
+            print >> sys.stderr, "name: can't analyze conformance of %s: %s" % (target, e)
+    return result
+
+
+def gradeCoverage(args, targets):
+    testDirs = []
+    if args.testDir:
+        testDirs.append(args.testDir)
+
+    filesAndTests = CoverageReport.getFilesAndTests(filter(isGradedModule, targets), testDirs)
+    filesAndTests = filter(lambda fileAndTest: fileAndTest[1] != None, filesAndTests)
+    gCovResults = GCov.getCoverages(map(lambda fileAndTest: fileAndTest[1], filesAndTests), args.jobs, args.backend)
+    summary = GCovSummary.removeTestSourceFiles(GCov.computeSummary(filesAndTests, gCovResults))
+
+    # GCov names each tested file as the file of the same name in the directory of the test executable.
+    testedFiles = { }
+    for (target, testExecutable) in filesAndTests:
+        for testedFile in [ os.path.abspath(target), os.path.join(os.path.dirname(testExecutable), os.path.basename(target)) ]:
+            if testedFile in summary:
+                testedFiles[target] = summary[testedFile]
+                break
+
+    return CoverageReport.coverageRecords(testedFiles)
+
+
+def gradeDocumentation(args, targets):
+    with open(args.doxygenlog, 'r') as f:
+        documentation = DoxygenReport.organize(DoxygenReport.canonicalize(f.readlines()))
+
+    # Doxygen reports the files it read by whatever name it was given them.
+    documentationByPath = dict(map(lambda entry: (os.path.abspath(entry), documentation[entry]), documentation))
+
+    result = []
+    for target in targets:
+        path = os.path.abspath(target)
+        if path in documentationByPath:
+            result.append(DoxygenReport.documentationRecord(target, documentationByPath[path]))
+    return result
+
+
+def gradeVocabulary(args, targets):
+    options, arguments = hfcca.createHfccaCommandLineParser().parse_args(args=["Scorecard"])
+    fileInformationList = map(lambda x : x, hfcca.analyze(targets, options))
+    return map(lambda file: VocabularyReport.fileRecord(file), fileInformationList)
+
+
+graderFunctions = {
+    "style" : gradeStyle,
+    "name" : gradeName,
+    "coverage" : gradeCoverage,
+    "documentation" : gradeDocumentation,
+    "vocabulary" : gradeVocabulary,
+}
+
+
+def getGraders(args):
+    '''
+    The graders named by args.graders that can run, warning of those that cannot.
+    '''
+    result = []
+    for grader in args.graders.split(","):
+        grader = grader.strip()
+        if not grader in graderFunctions:
+            print >> sys.stderr, "Unknown grader %s, expected one of %s" % (grader, ", ".join(GRADERS))
+        elif grader == "documentation" and not args.doxygenlog:
+            print >> sys.stderr, "Skipping documentation: no doxygen log (--doxygenlog)"
+        elif grader == "vocabulary" and hfcca is None:
+            print >> sys.stderr, "Skipping vocabulary: HFCCA not found"
+        else:
+            result.append(grader)
+    return result
+
+
+def gradeTargets(args, targets, graders):
+    '''
+    Run each grader over the targets, returning the report records of all of them.
+    A grader that fails is reported on standard error and contributes no records.
+    '''
+    result = []
+    for grader in graders:
+        try:
+            result = result + graderFunctions[grader](args, targets)
+        except Exception as e:
+            print >> sys.stderr, "%s: could not grade: %s" % (grader, e)
+            if args.trace:
+                traceback.print_exc()
+    return result
+
+
+def computeScorecard(targets, graders, records):
+    '''
+    Compute the scorecard of the targets: a dictionary mapping each target file
+    to a dictionary mapping each grader to the lowest score it gave the file.
+    '''
+    result = dict(map(lambda target: (target, { }), targets))
+    for record in records:
+        if record["score"] is None or not record["file"] in result:
+            continue
+        scores = result[record["file"]]
+        if not record["tool"] in scores or record["score"] < scores[record["tool"]]:
+            scores[record["tool"]] = record["score"]
+    return result
+
+
+def textScorecard(distribution, targets, graders, scorecard):
+    if len(targets) < 1:
+        LongBow.getReportSink().printLine("No Files To Grade")
+        return
+
+    maxFileNameLength = max(max(map(lambda target: len(target), targets)), len("File Name"))
+    columnWidth = max(map(lambda grader: len(grader), graders) + [6])
+    headerFormat = "%-" + str(maxFileNameLength) + "s" + (" %" + str(columnWidth) + "s") * len(graders)
+    LongBow.getReportSink().printLine(headerFormat % tuple(["File Name"] + graders))
+
+    for target in targets:
+        scores = scorecard[target]
+        line = "%-*s" % (maxFileNameLength, target)
+        for grader in graders:
+            if grader in scores:
+                line = line + " %*.2f" % (columnWidth, scores[grader])
+            else:
+                line = line + " %*s" % (columnWidth, "-")
+        if len(scores) > 0:
+            LongBow.scorePrinter(distribution, min(scores.values()), line)
+        else:
+            LongBow.getReportSink().printLine(line)
+    return
+
+
+def csvScorecard(targets, graders, scorecard):
+    sink = LongBow.getReportSink()
+    sink.printRow(["file"] + graders)
+    for target in targets:
+        scores = scorecard[target]
+        sink.printRow([target] + map(lambda grader: "%.2f" % scores[grader] if grader in scores else "", graders))
+    return
+
+
+def commandLineMain(args, roots):
+    FileUtil.setSourceCache(FileUtil.SourceCache())
+    if args.artifactIndex:
+        ArtifactIndex.getArtifactIndex().load(args.artifactIndex)
+    if args.store:
+        GCov.setCoverageStore(CoverageStore.CoverageStore(args.store))
+
+    targets = findTargets(roots)
+    graders = getGraders(args)
+
+    records = gradeTargets(args, targets, graders)
+
+    if args.output == "json":
+        LongBow.printRecords(records)
+    elif args.output == "csv":
+        csvScorecard(targets, graders, computeScorecard(targets, graders, records))
+    else:
+        textScorecard(eval(args.distribution), targets, graders, computeScorecard(targets, graders, records))
+
+    if args.artifactIndex:
+        ArtifactIndex.getArtifactIndex().save(args.artifactIndex)
+    if args.store:
+        GCov.coverageStore.close()
+        GCov.setCoverageStore(None)
+    FileUtil.setSourceCache(None)
+
+    return True
@@ -57,89 +57,181 @@
 
 import sys
 import os
+import shutil
 import tempfile
 import subprocess
 import difflib
 import csv
 import argparse
+import multiprocessing
+import itertools
 
 import LongBow
 import ANSITerm
 import FileUtil
+import ExemplarCache
 import pprint
 
-def getExemplar(fileName, command, config):
-    """Create the exemplar formatted file into memory as a string"""
+# The options of every exemplar command, whether it reads the file from standard input or by name,
+# so both produce the same exemplar: the language is given rather than guessed from the file name extension.
+EXEMPLAR_OPTIONS = [ "-q", "-l", "C" ]
+
+# If not None, the ExemplarCache.ExemplarCache used to remember exemplars between invocations.
+exemplarCache = None
+
+def setExemplarCache(cache):
+    global exemplarCache
+    exemplarCache = cache
+    return
+
+
+def runExemplarCommand(fileName, command, config):
+    """Run the exemplar command to format the file into memory as a string"""
 
-    with open(fileName) as inputFile:
-        result = subprocess.check_output([command, "-q", "-c", config], stdin=inputFile)
+    process = subprocess.Popen([command] + EXEMPLAR_OPTIONS + [ "-c", config ], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    result = process.communicate(FileUtil.readFileString(fileName))[0]
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
     return result;
 
 
+def getExemplar(fileName, command, config):
+    """Create the exemplar formatted file into memory as a string, using the exemplar cache if there is one"""
+
+    if exemplarCache is None:
+        return runExemplarCommand(fileName, command, config)
+
+    key = exemplarCache.computeKey(FileUtil.readFileString(fileName), command, config, EXEMPLAR_OPTIONS)
+    result = exemplarCache.get(key)
+    if result is None:
+        result = runExemplarCommand(fileName, command, config)
+        exemplarCache.put(key, result)
+    return result
+
+
+def runExemplarCommandBatch(fileNames, command, config):
+    '''
+    Run a single exemplar command to format all of the given files,
+    returning a dictionary mapping each file name to its exemplar as a string.
+
+    The exemplar command reads the list of files to format from a file (-F)
+    and writes each exemplar into a temporary directory (--prefix),
+    so the cost of starting the command and parsing its configuration is paid once for all of the files.
+    Any file without an exemplar after the command completes is absent from the result.
+    '''
+    result = { }
+    temporaryDirectory = tempfile.mkdtemp(prefix="longbow-style-")
+    try:
+        listFileName = os.path.join(temporaryDirectory, "files")
+        outputDirectory = os.path.join(temporaryDirectory, "exemplars")
+        # Absolute paths keep every exemplar within the output directory.
+        absoluteNames = map(lambda fileName: os.path.abspath(fileName), fileNames)
+        with open(listFileName, "w") as listFile:
+            listFile.write("\n".join(absoluteNames) + "\n")
+
+        subprocess.call([command] + EXEMPLAR_OPTIONS + [ "-c", config, "-F", listFileName, "--prefix", outputDirectory, "--suffix", ".exemplar" ])
+
+        for (fileName, absoluteName) in zip(fileNames, absoluteNames):
+            exemplarFileName = outputDirectory + "/" + absoluteName + ".exemplar"
+            if os.path.isfile(exemplarFileName):
+                result[fileName] = FileUtil.readFileString(exemplarFileName)
+    finally:
+        shutil.rmtree(temporaryDirectory, ignore_errors=True)
+
+    return result
+
+
+def getExemplars(fileNames, command, config):
+    '''
+    Create the exemplar of each of the given files, returning a list of strings in the same order as fileNames.
+
+    The files are formatted by a single exemplar command, except for those found in the exemplar cache.
+    A file the batched command fails to format is formatted on its own, so errors are reported as for getExemplar.
+    '''
+    exemplars = { }
+    keys = { }
+    if exemplarCache is not None:
+        for fileName in fileNames:
+            keys[fileName] = exemplarCache.computeKey(FileUtil.readFileString(fileName), command, config, EXEMPLAR_OPTIONS)
+            exemplar = exemplarCache.get(keys[fileName])
+            if exemplar is not None:
+                exemplars[fileName] = exemplar
+
+    missing = filter(lambda fileName: fileName not in exemplars, fileNames)
+    if len(missing) > 1:
+        batchExemplars = runExemplarCommandBatch(missing, command, config)
+        for fileName in batchExemplars:
+            exemplars[fileName] = batchExemplars[fileName]
+            if exemplarCache is not None:
+                exemplarCache.put(keys[fileName], batchExemplars[fileName])
+
+    return map(lambda fileName: exemplars[fileName] if fileName in exemplars else getExemplar(fileName, command, config), fileNames)
+
+
 def diff(exemplar, fileName):
     d = difflib.Differ()
     differ = d.compare(exemplar.splitlines(), fileName.splitlines())
     return differ
 
 
-class Ratchet:
-    def __init__(self):
-        self.currentValue = 0
-        self.signal = 0
+def internLines(lines, lineIds):
+    '''
+    Map each line to a small integer identifying its content, so lines are compared by hash rather than character by character.
+    '''
+    return map(lambda line: lineIds.setdefault(line, len(lineIds)), lines)
 
-    def value(self):
-        return self.currentValue
 
-    def toggle(self, signal):
-        if self.signal == "-":
-            if signal == "-":
-                self.currentValue = self.currentValue + 1
-            elif signal == "?":
-                self.currentValue = self.currentValue + 1
-                self.signal = 0
-            else:
-                self.currentValue = self.currentValue + 1
-                self.signal = 0
-            pass
-        elif self.signal == "+":
-            if signal == "-":
-                self.currentValue = self.currentValue + 1
-            elif signal == "?":
-                self.currentValue = self.currentValue + 1
-                self.signal = 0
-            else:
-                self.currentValue = self.currentValue + 1
-                self.signal = 0
-            pass
-        else:
-            self.signal = signal;
+def computeOpcodes(original, exemplar):
+    '''
+    Compute the difflib opcodes that transform the list of lines original into the list of lines exemplar.
 
-        return self.currentValue
+    Unlike difflib.Differ, no intraline differences are computed.
+    The common leading and trailing lines are trimmed before the remaining lines are matched,
+    so the cost for a nearly compliant file is linear in the number of lines.
+    The automatic junk heuristic is off: in C, braces and blank lines are far more common than 1% of the lines,
+    and treating them as junk would count unchanged code as changed.
+    '''
+    prefix = 0
+    limit = min(len(original), len(exemplar))
+    while prefix < limit and original[prefix] == exemplar[prefix]:
+        prefix = prefix + 1
 
+    suffix = 0
+    limit = limit - prefix
+    while suffix < limit and original[-1 - suffix] == exemplar[-1 - suffix]:
+        suffix = suffix + 1
 
-def computeNonCompliantLines(differ):
-    lines = 0
-    changes = Ratchet()
+    lineIds = { }
+    a = internLines(original[prefix:len(original) - suffix], lineIds)
+    b = internLines(exemplar[prefix:len(exemplar) - suffix], lineIds)
 
-    for l in differ:
-        if l.startswith('-'):
-            changes.toggle(l[0])
-            lines = lines - 1
-        elif l.startswith('+'):
-            changes.toggle(l[0])
-            lines = lines + 1
-        elif l.startswith('?'):
-            pass
-        elif l.startswith(' '):
-            lines = lines +1
-        else:
-            print "What is this:", l
+    result = []
+    for (tag, i1, i2, j1, j2) in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        result.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+    return result
 
-    return changes.value()
+
+def computeNonCompliantLines(fileData, exemplarData):
+    '''
+    Count the lines in fileData that differ from the exemplar.
+
+    A line that is changed, removed or added counts once.
+    A block of changed lines counts as the larger of the number of original and exemplar lines in the block.
+    '''
+    result = 0
+    for (tag, i1, i2, j1, j2) in computeOpcodes(fileData.splitlines(), exemplarData.splitlines()):
+        if tag == "replace":
+            result = result + max(i2 - i1, j2 - j1)
+        elif tag == "delete":
+            result = result + (i2 - i1)
+        elif tag == "insert":
+            result = result + (j2 - j1)
+
+    return result
 
 
 def reportWhy(differ):
-    print '\n'.join(diff)
+    LongBow.getReportSink().printLine('\n'.join(diff))
     return
 
 
@@ -158,11 +250,16 @@ class SyntaxCompliance:
             sys.exit(1)
         pass
 
-    def check(self):
-        self.exemplarData = getExemplar(self.fileName, self.exemplarCommand, self.exemplarConfig)
-        differ = diff(self.fileData, self.exemplarData)
+    def check(self, exemplarData=None):
+        '''
+        Compute the number of non-compliant lines by comparing the file with its exemplar.
+        If exemplarData is None, the exemplar is created by running the exemplar command on the file.
+        '''
+        if exemplarData is None:
+            exemplarData = getExemplar(self.fileName, self.exemplarCommand, self.exemplarConfig)
+        self.exemplarData = exemplarData
 
-        self.nonCompliantLines = computeNonCompliantLines(differ)
+        self.nonCompliantLines = computeNonCompliantLines(self.fileData, self.exemplarData)
 
         return self
 
@@ -212,61 +309,96 @@ class SyntaxCompliance:
             elif l[0] == '?':
                 ansiTerm.printColorized("yellow", l[0:len(l)-1])
             else:
-                print l
+                LongBow.getReportSink().printLine(l)
                 pass
         return
 
 
-def csvScore(distribution, report):
-    string = "style,%s,%d,%d,%.2f" % (report["fileName"], report["totalLines"], report["nonCompliantLines"], report["score"])
-    LongBow.scorePrinter(distribution, report["score"], string)
-    return
+def complianceRecord(report):
+    '''
+    The report record (see LongBow.makeRecord) of the style compliance of one file.
+    '''
+    return LongBow.makeRecord("style", report["fileName"], "nonCompliantLines", report["nonCompliantLines"], report["score"],
+                              totalLines=report["totalLines"])
 
 
-def csvAverage(distribution, complianceList):
+def averageRecord(complianceList):
+    '''
+    The report record of the average of the style scores of all files.
+    '''
     scores = map(lambda target: target.getScore(), complianceList)
     sum = reduce(lambda sum, score : sum + score, scores)
     value = float(sum) / float(len(complianceList))
-    LongBow.scorePrinter(distribution, value, "%.2f" % (value))
-    return
+    return LongBow.makeRecord("style", None, "averageScore", value, value)
 
 
-def csvTotal(distribution, complianceList):
+def totalRecord(complianceList):
+    '''
+    The report record of the percentage of compliant lines in all files.
+    '''
     totalLines = reduce(lambda sum, x: sum + x, map(lambda element : element.getTotalLines(), complianceList))
     totalNonCompliantLines = reduce(lambda sum, x: sum + x, map(lambda element : element.getNonCompliantLines(), complianceList))
     value = 100.0 - (100.0 * float(totalNonCompliantLines) / float(totalLines))
-    LongBow.scorePrinter(distribution, value, "%.2f" % (value))
+    return LongBow.makeRecord("style", None, "compliantLines", value, value, totalLines=totalLines, nonCompliantLines=totalNonCompliantLines)
+
+
+def csvScore(distribution, record):
+    string = "style,%s,%d,%d,%.2f" % (record["file"], record["totalLines"], record["value"], record["score"])
+    LongBow.scorePrinter(distribution, record["score"], string)
+    return
+
+
+def csvAverage(distribution, complianceList):
+    record = averageRecord(complianceList)
+    LongBow.scorePrinter(distribution, record["score"], "%.2f" % (record["value"]))
+    return
+
+
+def csvTotal(distribution, complianceList):
+    record = totalRecord(complianceList)
+    LongBow.scorePrinter(distribution, record["score"], "%.2f" % (record["value"]))
     return
 
 
 def csvSummary(distribution, complianceList):
-    map(lambda target: csvScore(distribution, target.report()), complianceList)
+    map(lambda target: csvScore(distribution, complianceRecord(target.report())), complianceList)
+    return
+
+
+def jsonSummary(complianceList):
+    LongBow.printRecords(map(lambda target: complianceRecord(target.report()), complianceList))
+    return
+
+
+def jsonAverage(complianceList):
+    LongBow.printRecords([averageRecord(complianceList)])
+    return
+
+
+def jsonTotal(complianceList):
+    LongBow.printRecords([totalRecord(complianceList)])
     return
 
 
-def textScore(distribution, report, maxFileNameLength, prefix=""):
+def textScore(distribution, record, maxFileNameLength, prefix=""):
     '''
 
     '''
     format = "%s%-*s %6d %6d %6.2f"
-    string = format % (prefix, maxFileNameLength, report["fileName"], report["totalLines"], report["nonCompliantLines"], report["score"])
-    LongBow.scorePrinter(distribution, report["score"], string)
+    string = format % (prefix, maxFileNameLength, record["file"], record["totalLines"], record["value"], record["score"])
+    LongBow.scorePrinter(distribution, record["score"], string)
     return
 
 
 def textAverage(distribution, complianceList):
-    scores = map(lambda target: target.getScore(), complianceList)
-    sum = reduce(lambda sum, score : sum + score, scores)
-    value = float(sum) / float(len(complianceList))
-    LongBow.scorePrinter(distribution, value, "%.2f" % (value))
+    record = averageRecord(complianceList)
+    LongBow.scorePrinter(distribution, record["score"], "%.2f" % (record["value"]))
     return
 
 
 def textTotal(distribution, complianceList):
-    totalLines = reduce(lambda sum, x: sum + x, map(lambda element : element.getTotalLines(), complianceList))
-    totalNonCompliantLines = reduce(lambda sum, x: sum + x, map(lambda element : element.getNonCompliantLines(), complianceList))
-    value = 100.0 - (100.0 * float(totalNonCompliantLines) / float(totalLines))
-    LongBow.scorePrinter(distribution, value, "%.2f" % (value))
+    record = totalRecord(complianceList)
+    LongBow.scorePrinter(distribution, record["score"], "%.2f" % (record["value"]))
     return
 
 
@@ -274,8 +406,8 @@ def textSummary(distribution, complianceList, prefix=""):
     if len(complianceList) > 0:
         maxFileNameLength = max(max(map(lambda target: len(target.getFileName()), complianceList)), len("File Name"))
 
-        print "%s%-*s %6s %6s %6s" % (prefix, maxFileNameLength, "File Name", "Lines", "Errors", "Score")
-        map(lambda target: textScore(distribution, target.report(), maxFileNameLength, prefix), complianceList)
+        LongBow.getReportSink().printLine("%s%-*s %6s %6s %6s" % (prefix, maxFileNameLength, "File Name", "Lines", "Errors", "Score"))
+        map(lambda target: textScore(distribution, complianceRecord(target.report()), maxFileNameLength, prefix), complianceList)
 
     return
 
@@ -306,6 +438,8 @@ def displaySummary(args, complianceList):
         textSummary(distribution, complianceList)
     elif args.output == "gui":
         textSummary(distribution, complianceList)
+    elif args.output == "json":
+        jsonSummary(complianceList)
     else:
         csvSummary(distribution, complianceList)
     return
@@ -319,6 +453,8 @@ def displayAverage(args, complianceList):
         textAverage(distribution, complianceList)
     elif args.output == "gui":
         textAverage(distribution, complianceList)
+    elif args.output == "json":
+        jsonAverage(complianceList)
     else:
         csvAverage(distribution, complianceList)
     return
@@ -331,6 +467,8 @@ def displayTotal(args, complianceList):
         textTotal(distribution, complianceList)
     elif args.output == "gui":
         textTotal(distribution, complianceList)
+    elif args.output == "json":
+        jsonTotal(complianceList)
     else:
         csvTotal(distribution, complianceList)
     return
@@ -366,7 +504,7 @@ def sortComplianceList(args, complianceList):
     if args.key == "help":
         print >> sys.stderr, "Supported sort keys:"
         map(lambda k: sys.stderr.write("'" + k + "' "), sorted(sorter))
-        print
+        LongBow.getReportSink().printLine()
         sys.exit(1)
 
     if args.key in sorter:
@@ -401,11 +539,59 @@ def gradeAndPrint(targets, exemplarCommand, exemplarConfig, problemsOnly=False,
     textSummary(distribution, complianceList, prefix)
 
     for target in problemList:
-        print LongBow.buildRed("%s%s could not be evaluated" % (prefix, target))
+        LongBow.getReportSink().printLine("%s%s could not be evaluated" % (prefix, target), "red")
+
+
+def _computeNonCompliantLines(batch):
+    '''
+    Check each SyntaxCompliance in the list batch, returning the number of non-compliant lines of each.
+    This is the unit of work given to each worker process.
+    '''
+    if len(batch) == 1:
+        return [ batch[0].check().getNonCompliantLines() ]
+
+    exemplars = getExemplars(map(lambda compliance: compliance.getFileName(), batch), batch[0].getExemplarCommand(), batch[0].getExemplarConfig())
+    return map(lambda compliance, exemplar: compliance.check(exemplar).getNonCompliantLines(), batch, exemplars)
+
+
+def checkTargets(targets, exemplarCommand, exemplarConfig, jobs=1, batchSize=0):
+    '''
+    Check the style compliance of each target file, returning a list of SyntaxCompliance in the same order as targets.
+
+    If batchSize is greater than 0, up to batchSize files are formatted by each invocation of the exemplar command,
+    otherwise each file is formatted by its own invocation.
+    If jobs is greater than 1, the exemplar generation and comparison is performed by a pool of jobs worker processes.
+    '''
+    complianceList = map(lambda target: SyntaxCompliance(target, exemplarCommand, exemplarConfig), targets)
+
+    if batchSize > 0:
+        # Never make the batches so large that some of the workers would have nothing to do.
+        batchSize = max(1, min(batchSize, (len(complianceList) + jobs - 1) / max(jobs, 1)))
+    else:
+        batchSize = 1
+    batches = [ complianceList[i:i + batchSize] for i in range(0, len(complianceList), batchSize) ]
+
+    if jobs <= 1 or len(batches) < 2:
+        nonCompliantLines = map(_computeNonCompliantLines, batches)
+    else:
+        pool = multiprocessing.Pool(min(jobs, len(batches)))
+        try:
+            nonCompliantLines = pool.map(_computeNonCompliantLines, batches, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for (compliance, lines) in zip(complianceList, itertools.chain.from_iterable(nonCompliantLines)):
+        compliance.nonCompliantLines = lines
+
+    return complianceList
 
 
 def commandLineMain(args, targets, exemplarCommand, exemplarConfig):
-    complianceList = map(lambda target: SyntaxCompliance(target, exemplarCommand, exemplarConfig).check(), targets)
+    if args.cache:
+        setExemplarCache(ExemplarCache.ExemplarCache(args.cache, args.cacheSize * 1024 * 1024))
+
+    complianceList = checkTargets(targets, exemplarCommand, exemplarConfig, args.jobs, args.batch)
 
     complianceList = sortComplianceList(args, complianceList)
 
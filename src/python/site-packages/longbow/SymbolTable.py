@@ -59,6 +59,8 @@ import subprocess
 import re
 import sys
 import pprint
+import ELF
+import Archive
 
 def parseLocation(location):
   token = location.split("[")
@@ -102,6 +104,28 @@ def getDarwinSymbolTable(objectFileName, accumulator = { }):
   return parseDarwinOutput(lines, accumulator)
 
 
+def getElfSymbolTable(objectFileName, accumulator = { }):
+  '''
+  Read the global symbols of an ELF file directly, without running nm.
+  '''
+  libraryName, memberName = Archive.parseMemberPath(objectFileName)
+  if memberName is None:
+    libraryName, memberName = None, objectFileName
+
+  entry = { "fullName" : objectFileName, "libraryName" : libraryName, "objectFileName" : memberName, "defined" : [], "undefined" : [], "globalData" : [] }
+  for symbol in ELF.getSymbols(objectFileName):
+    if symbol["binding"] == "local":
+      continue
+    if symbol["section"] == "undefined":
+      entry["undefined"].append({ "name" : symbol["name"] })
+    elif symbol["type"] == "function" and symbol["section"] == "text":
+      entry["defined"].append({ "name" : symbol["name"] })
+    elif symbol["type"] == "object":
+      entry["globalData"].append({ "name" : symbol["name"] })
+
+  accumulator[objectFileName] = entry
+  return accumulator
+
 def getSymbolTable(objectFileName, accumulator = { }):
   '''
   {
@@ -113,6 +137,8 @@ def getSymbolTable(objectFileName, accumulator = { }):
                },
   }
   '''
+  if ELF.isELF(objectFileName):
+    return getElfSymbolTable(objectFileName, accumulator)
   return getDarwinSymbolTable(objectFileName, accumulator)
 
 
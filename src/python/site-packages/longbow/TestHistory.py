@@ -0,0 +1,195 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import json
+import tempfile
+import zlib
+
+# The number of runs of each test whose durations are kept.
+DEFAULT_DEPTH = 10
+
+# A test is reported as slower when it takes this many times as long as the mean of its previous runs...
+DEFAULT_REGRESSION_FACTOR = 1.5
+
+# ...and at least this many seconds longer, so the noise in the timing of very short tests is ignored...
+MINIMUM_REGRESSION = 0.01
+
+# ...and it has run at least this many times before.
+MINIMUM_RUNS = 3
+
+
+class TestHistory:
+    '''
+    The wall clock durations, in seconds, of the last runs of each test, kept in a JSON file between invocations.
+
+    The file maps the name of each test to the list of its durations, oldest first.
+    Saving merges the durations added since the file was loaded into the file as it is then,
+    so processes sharing the file do not lose each other's durations.
+    '''
+    def __init__(self, fileName, depth=DEFAULT_DEPTH):
+        self.fileName = fileName
+        self.depth = depth
+        self.durations = self.read()
+        self.added = { }
+        return
+
+    def read(self):
+        '''
+        Read the durations from the file. A missing or unreadable file is the same as an empty one.
+        '''
+        try:
+            with open(self.fileName, "r") as file:
+                durations = json.load(file)
+        except (IOError, ValueError):
+            return { }
+        return dict(map(lambda item: (item[0].encode("utf-8"), item[1]), durations.items()))
+
+    def getDurations(self, name):
+        '''
+        Return the list of the recorded durations of the named test, oldest first.
+        '''
+        return self.durations.get(name, [])
+
+    def getExpectedDuration(self, name):
+        '''
+        Return the mean of the recorded durations of the named test, or None if it has none.
+        '''
+        durations = self.getDurations(name)
+        if len(durations) == 0:
+            return None
+        return sum(durations) / float(len(durations))
+
+    def put(self, name, duration):
+        self.durations[name] = (self.getDurations(name) + [duration])[-self.depth:]
+        self.added[name] = self.added.get(name, []) + [duration]
+        return
+
+    def save(self):
+        '''
+        Save the durations to the file, replacing it atomically.
+        '''
+        durations = self.read()
+        for name in self.added:
+            durations[name] = (durations.get(name, []) + self.added[name])[-self.depth:]
+        self.durations = durations
+        self.added = { }
+
+        directory = os.path.dirname(os.path.abspath(self.fileName))
+        (fd, temporaryPath) = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as output:
+            json.dump(durations, output, indent=1, sort_keys=True)
+        os.rename(temporaryPath, self.fileName)
+        return
+
+
+def findRegressions(history, durations, factor=DEFAULT_REGRESSION_FACTOR):
+    '''
+    Given a list of (name, duration) tuples of a run not yet added to the history,
+    return the list of (name, duration, expected duration) tuples of those that took factor times as long as their expected duration.
+    '''
+    result = []
+    for (name, duration) in durations:
+        if len(history.getDurations(name)) < MINIMUM_RUNS:
+            continue
+        expected = history.getExpectedDuration(name)
+        if duration > expected * factor and duration - expected >= MINIMUM_REGRESSION:
+            result.append((name, duration, expected))
+    return result
+
+
+def orderLongestFirst(names, history):
+    '''
+    Return the positions of the names in the order they should be run to finish soonest on several workers:
+    those with no recorded duration first, in the order given, as nothing is known of how long they take,
+    then the rest in descending order of their expected duration (longest processing time first).
+    '''
+    expected = map(lambda name: history.getExpectedDuration(name), names)
+    unknown = filter(lambda position: expected[position] is None, range(len(names)))
+    known = filter(lambda position: expected[position] is not None, range(len(names)))
+    return unknown + sorted(known, key=lambda position: -expected[position])
+
+
+def assignShards(names, expectedDurations, count):
+    '''
+    Assign each of the named tests to one of count shards, returning the list of the shard (0 to count - 1) of each.
+
+    The assignment depends only on the names and expected durations (None where unknown),
+    so every shard given the same tests and history computes the same assignment.
+    Tests with an expected duration are assigned longest first, each to the shard with the least expected duration so far;
+    the others are assigned first, by a stable hash (CRC-32) of their name, each counted as taking the mean of the expected durations.
+    '''
+    result = [ None ] * len(names)
+    loads = [ 0.0 ] * count
+
+    known = filter(lambda position: expectedDurations[position] is not None, range(len(names)))
+    meanDuration = 0.0
+    if len(known) > 0:
+        meanDuration = sum(map(lambda position: expectedDurations[position], known)) / len(known)
+
+    for position in range(len(names)):
+        if expectedDurations[position] is None:
+            shard = (zlib.crc32(names[position]) & 0xffffffff) % count
+            result[position] = shard
+            loads[shard] = loads[shard] + meanDuration
+
+    for position in sorted(known, key=lambda position: (-expectedDurations[position], names[position])):
+        shard = loads.index(min(loads))
+        result[position] = shard
+        loads[shard] = loads[shard] + expectedDurations[position]
+
+    return result
@@ -0,0 +1,376 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import re
+import json
+import time
+import tempfile
+import subprocess
+import xml.etree.ElementTree as ElementTree
+
+import TestHistory
+
+# The statuses a LongBow test case may report (see longBowStatus_ToString), by their classification in longBow_Status.c.
+SUCCEEDED_STATUSES = [ "Succeeded" ]
+WARNING_STATUSES = [ "Warning", "Tear Down Warning" ]
+INCOMPLETE_STATUSES = [ "Skipped", "Unimplemented", "Impotent" ]
+FAILED_STATUSES = [ "Failed", "Stopped", "Tear Down Failed", "Setup Failed", "Memory Leak" ]
+
+_colorPattern = re.compile("\x1b\\[[0-9;]*m")
+
+# runner/fixture/case elapsed utime stime eventCount status (longBowReportTesting_TestCase)
+_testCasePattern = re.compile("^(\\S+)/([^/\\s]+)/([^/\\s]+) ([0-9.]+)s ([0-9.]+)s ([0-9.]+)s ([0-9]+) (.+)$")
+
+# runner/fixture: Ran N test cases. ... (the fixture summary of longBowReportTesting_TestFixture)
+_testFixturePattern = re.compile("^(\\S+)/([^/\\s]+): Ran ([0-9]+) test cases?\\.")
+
+# runner: N fixtures (longBowReportTesting_TestRunner)
+_testRunnerPattern = re.compile("^(\\S+): ([0-9]+) fixtures?$")
+
+# runner status (longBowReportTesting_TestRunner with --silent)
+_testRunnerStatusPattern = re.compile("^(\\S+) (" + "|".join(SUCCEEDED_STATUSES + WARNING_STATUSES + INCOMPLETE_STATUSES + FAILED_STATUSES) + "|Signaled .+)$")
+
+
+def classifyStatus(status):
+    '''
+    Return the class of a test case status: "succeeded", "warning", "incomplete" or "failed".
+    Any status this does not know, such as "Signaled ...", is a failure.
+    '''
+    if status in SUCCEEDED_STATUSES:
+        return "succeeded"
+    if status in WARNING_STATUSES:
+        return "warning"
+    if status in INCOMPLETE_STATUSES:
+        return "incomplete"
+    return "failed"
+
+
+def parseReportLine(line):
+    '''
+    Parse a line of the report a LongBow test runner writes on its standard output,
+    returning a dictionary describing it, or None if it is not one of:
+
+    { "type" : "testCase", "runner", "fixture", "testCase", "elapsed", "userTime", "systemTime", "eventCount", "status" }
+    { "type" : "testFixture", "runner", "fixture", "testCases" }
+    { "type" : "testRunner", "runner", "fixtures" }
+    { "type" : "testRunnerStatus", "runner", "status" }
+
+    Times are in seconds.
+    '''
+    line = _colorPattern.sub("", line).strip()
+
+    match = _testCasePattern.match(line)
+    if match:
+        return { "type" : "testCase", "runner" : match.group(1), "fixture" : match.group(2), "testCase" : match.group(3),
+                 "elapsed" : float(match.group(4)), "userTime" : float(match.group(5)), "systemTime" : float(match.group(6)),
+                 "eventCount" : int(match.group(7)), "status" : match.group(8) }
+
+    match = _testFixturePattern.match(line)
+    if match:
+        return { "type" : "testFixture", "runner" : match.group(1), "fixture" : match.group(2), "testCases" : int(match.group(3)) }
+
+    match = _testRunnerPattern.match(line)
+    if match:
+        return { "type" : "testRunner", "runner" : match.group(1), "fixtures" : int(match.group(2)) }
+
+    match = _testRunnerStatusPattern.match(line)
+    if match:
+        return { "type" : "testRunnerStatus", "runner" : match.group(1), "status" : match.group(2) }
+
+    return None
+
+
+class TestRunnerResult:
+    '''
+    The results of one run of a LongBow test runner, collected from its report one line at a time.
+    '''
+    def __init__(self, testRunner):
+        self.testRunner = testRunner
+        self.name = None
+        self.status = None
+        self.exitStatus = None
+        self.timedOut = False
+        self.elapsed = 0.0
+        self.fixtures = [ ]
+        self.testCases = [ ]
+        return
+
+    def addLine(self, line):
+        '''
+        Add the result, if any, reported by the line, returning the dictionary parseReportLine made of it.
+        '''
+        item = parseReportLine(line)
+        if item is None:
+            return None
+
+        if self.name is None:
+            self.name = item["runner"]
+        if item["type"] == "testCase":
+            self.testCases.append(item)
+        elif item["type"] == "testFixture":
+            self.fixtures.append(item)
+        elif item["type"] == "testRunnerStatus":
+            self.status = item["status"]
+        return item
+
+    def addLines(self, lines):
+        for line in lines:
+            self.addLine(line)
+        return self
+
+    def finish(self, exitStatus, elapsed, timedOut=False):
+        self.exitStatus = exitStatus
+        self.elapsed = elapsed
+        self.timedOut = timedOut
+        return self
+
+    def getName(self):
+        if self.name is None:
+            return os.path.basename(self.testRunner)
+        return self.name
+
+    def getFixtureElapsed(self, fixture):
+        return sum(map(lambda testCase: testCase["elapsed"], filter(lambda testCase: testCase["fixture"] == fixture, self.testCases)))
+
+    def getDurations(self):
+        '''
+        Return the list of (name, elapsed seconds) tuples of each fixture (runner/fixture) and test case (runner/fixture/testCase).
+        '''
+        fixtures = map(lambda fixture: (fixture["runner"] + "/" + fixture["fixture"], self.getFixtureElapsed(fixture["fixture"])), self.fixtures)
+        testCases = map(lambda testCase: (testCase["runner"] + "/" + testCase["fixture"] + "/" + testCase["testCase"], testCase["elapsed"]), self.testCases)
+        return fixtures + testCases
+
+    def getFailedTestCases(self):
+        return filter(lambda testCase: classifyStatus(testCase["status"]) == "failed", self.testCases)
+
+    def isSuccessful(self):
+        return self.exitStatus == 0 and not self.timedOut and len(self.getFailedTestCases()) == 0
+
+    def toDictionary(self):
+        fixtures = map(lambda fixture: dict(fixture.items() + [ ("elapsed", self.getFixtureElapsed(fixture["fixture"])) ]), self.fixtures)
+        return { "testRunner" : self.testRunner, "name" : self.getName(), "exitStatus" : self.exitStatus, "timedOut" : self.timedOut,
+                 "elapsed" : self.elapsed, "fixtures" : fixtures, "testCases" : self.testCases }
+
+
+def recordDurations(results, history, factor=TestHistory.DEFAULT_REGRESSION_FACTOR):
+    '''
+    Add the duration of each fixture and test case of the results to the history,
+    returning the list of (name, duration, expected duration) tuples of those that were slower than in previous runs.
+    '''
+    durations = reduce(lambda durations, result: durations + result.getDurations(), results, [])
+    regressions = TestHistory.findRegressions(history, durations, factor)
+    for (name, duration) in durations:
+        history.put(name, duration)
+    return regressions
+
+
+def getSlowestTestCases(results, count):
+    '''
+    Return the count slowest test cases of the results, slowest first.
+    '''
+    testCases = reduce(lambda testCases, result: testCases + result.testCases, results, [])
+    return sorted(testCases, key=lambda testCase: -testCase["elapsed"])[:count]
+
+
+def formatSlowestTestCases(results, count):
+    '''
+    Return the lines of a report of the count slowest test cases of the results.
+    '''
+    testCases = getSlowestTestCases(results, count)
+    lines = [ "Slowest %d test cases:" % len(testCases) ]
+    for testCase in testCases:
+        lines.append("  %10.6fs %s/%s/%s" % (testCase["elapsed"], testCase["runner"], testCase["fixture"], testCase["testCase"]))
+    return lines
+
+
+def formatRegressions(regressions):
+    '''
+    Return the lines of a report of the fixtures and test cases that were slower than in previous runs (see recordDurations).
+    '''
+    if len(regressions) == 0:
+        return []
+    lines = [ "%d fixtures and test cases were slower than the mean of their previous runs:" % len(regressions) ]
+    for (name, duration, expected) in sorted(regressions, key=lambda regression: regression[2] - regression[1]):
+        lines.append("  %10.6fs %s, previously %.6fs" % (duration, name, expected))
+    return lines
+
+
+def readLogFile(testRunner, logFileName):
+    '''
+    Collect the results of a test runner from the log of its standard output.
+    '''
+    result = TestRunnerResult(testRunner)
+    with open(logFileName, "r") as logFile:
+        result.addLines(logFile)
+    return result
+
+
+def runTestRunner(testRunner, options=[], logFile=None, reportItem=None):
+    '''
+    Run the test runner, collecting its results from its standard output as it is written.
+    Each line is copied to logFile if it is not None, and each result is passed to reportItem if it is not None.
+    '''
+    result = TestRunnerResult(testRunner)
+    startTime = time.time()
+    try:
+        process = subprocess.Popen([ testRunner ] + options, stdout=subprocess.PIPE)
+    except OSError, e:
+        if logFile is not None:
+            logFile.write("%s: %s\n" % (testRunner, e))
+        return result.finish(127, time.time() - startTime)
+
+    for line in iter(process.stdout.readline, ""):
+        if logFile is not None:
+            logFile.write(line)
+        item = result.addLine(line)
+        if item is not None and reportItem is not None:
+            reportItem(item)
+
+    process.stdout.close()
+    return result.finish(process.wait(), time.time() - startTime)
+
+
+class JUnitWriter:
+    '''
+    Write the results of test runners to a JUnit XML file, one testsuite per test runner.
+    The file is rewritten, atomically, as each result is added,
+    so it always holds the complete results of every test runner that has finished.
+    '''
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.testsuites = ElementTree.Element("testsuites")
+        self.write()
+        return
+
+    def makeTestSuite(self, result):
+        testsuite = ElementTree.SubElement(self.testsuites, "testsuite", name=result.getName(), time="%.6f" % result.elapsed)
+        counts = { "failed" : 0, "incomplete" : 0 }
+        for testCase in result.testCases:
+            element = ElementTree.SubElement(testsuite, "testcase", classname=result.getName() + "." + testCase["fixture"],
+                                             name=testCase["testCase"], time="%.6f" % testCase["elapsed"])
+            statusClass = classifyStatus(testCase["status"])
+            if statusClass == "failed":
+                ElementTree.SubElement(element, "failure", message=testCase["status"])
+                counts[statusClass] = counts[statusClass] + 1
+            elif statusClass == "incomplete":
+                ElementTree.SubElement(element, "skipped", message=testCase["status"])
+                counts[statusClass] = counts[statusClass] + 1
+
+        # A test runner that failed without reporting a failed test case (it crashed or ran too long) is an error.
+        errors = 0
+        if not result.isSuccessful() and counts["failed"] == 0:
+            element = ElementTree.SubElement(testsuite, "testcase", classname=result.getName(), name=result.getName(), time="%.6f" % result.elapsed)
+            if result.timedOut:
+                message = "Timed out"
+            else:
+                message = "Exit status %d" % result.exitStatus
+            ElementTree.SubElement(element, "error", message=message)
+            errors = 1
+
+        testsuite.set("tests", str(len(testsuite)))
+        testsuite.set("failures", str(counts["failed"]))
+        testsuite.set("errors", str(errors))
+        testsuite.set("skipped", str(counts["incomplete"]))
+        return testsuite
+
+    def add(self, result):
+        self.makeTestSuite(result)
+        self.write()
+        return
+
+    def write(self):
+        directory = os.path.dirname(os.path.abspath(self.fileName))
+        (fd, temporaryPath) = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as output:
+            ElementTree.ElementTree(self.testsuites).write(output, encoding="UTF-8")
+        os.rename(temporaryPath, self.fileName)
+        return
+
+    def close(self):
+        return
+
+
+class JSONLinesWriter:
+    '''
+    Write the results of test runners to a file as JSON, one test runner (see TestRunnerResult.toDictionary) per line.
+    Each line is flushed as it is written.
+    '''
+    def __init__(self, fileName):
+        self.file = open(fileName, "w")
+        return
+
+    def add(self, result):
+        self.file.write(json.dumps(result.toDictionary(), sort_keys=True) + "\n")
+        self.file.flush()
+        return
+
+    def close(self):
+        self.file.close()
+        return
+
+
+def openResultWriters(junitFileName="", jsonLinesFileName=""):
+    '''
+    Return the list of writers of the result files with the given names, where an empty name is no file.
+    '''
+    result = []
+    if junitFileName:
+        result.append(JUnitWriter(junitFileName))
+    if jsonLinesFileName:
+        result.append(JSONLinesWriter(jsonLinesFileName))
+    return result
@@ -0,0 +1,278 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import json
+import hashlib
+import tempfile
+import subprocess
+
+import ELF
+import ArtifactIndex
+import SymbolTable
+
+# The file name extensions of the shared libraries a test runner may be linked with (versioned names such as libparc.so.1 included).
+LIBRARY_EXTENSIONS = (".so", ".dylib")
+
+
+def isLibrary(fileName):
+    return fileName.endswith(LIBRARY_EXTENSIONS) or ".so." in fileName
+
+
+def findLibraries(directories):
+    '''
+    Return the real paths of the shared libraries beneath the directories, each once however many links name it.
+    '''
+    result = set()
+    def visit(dirpath, filenames):
+        for filename in filter(isLibrary, filenames):
+            path = os.path.join(dirpath, filename)
+            if os.path.isfile(path):
+                result.add(os.path.realpath(path))
+        return
+
+    artifactIndex = ArtifactIndex.ArtifactIndex()
+    for directory in directories:
+        artifactIndex.walkTree(directory, visit)
+    return sorted(result)
+
+
+def hashFile(fileName):
+    digest = hashlib.sha1()
+    with open(fileName, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), ""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def readSymbols(fileName):
+    '''
+    Return the tuple (set of defined symbols, set of undefined symbols) of the named object file, executable or shared library,
+    from SymbolTable.getSymbolTable, or None if its symbol table cannot be read.
+    '''
+    try:
+        table = SymbolTable.getSymbolTable(fileName, { })
+    except (OSError, IOError, ELF.ELFError, subprocess.CalledProcessError):
+        return None
+
+    defined = set()
+    undefined = set()
+    for entry in table.values():
+        defined.update(map(lambda symbol: symbol["name"], entry["defined"] + entry["globalData"]))
+        undefined.update(map(lambda symbol: symbol["name"], entry["undefined"]))
+    return (defined, undefined - defined)
+
+
+class SymbolIndex:
+    '''
+    An index of the symbols defined by a set of shared libraries,
+    by which the libraries a test runner is linked with are found from the symbols it leaves undefined.
+    The symbol tables of the libraries are read once, the first time they are needed.
+    '''
+    def __init__(self, libraries=[]):
+        self.libraries = libraries
+        self.definitions = None
+        self.undefined = { }
+        return
+
+    def load(self):
+        self.definitions = { }
+        for library in self.libraries:
+            symbols = readSymbols(library)
+            if symbols is None:
+                continue
+            for name in symbols[0]:
+                self.definitions.setdefault(name, set()).add(library)
+            self.undefined[library] = symbols[1]
+        return
+
+    def getDependencies(self, fileName):
+        '''
+        Return the sorted list of the libraries that define the symbols the named file leaves undefined,
+        and in turn those that define the symbols they leave undefined.
+        '''
+        if self.definitions is None:
+            self.load()
+
+        symbols = readSymbols(fileName)
+        if symbols is None:
+            return []
+
+        result = set()
+        pending = [ symbols[1] ]
+        while len(pending) > 0:
+            for name in pending.pop():
+                for library in self.definitions.get(name, ()):
+                    if library not in result:
+                        result.add(library)
+                        pending.append(self.undefined[library])
+        result.discard(os.path.realpath(fileName))
+        return sorted(result)
+
+
+class TestSelection:
+    '''
+    The state by which longbow-test-suite selects the test runners to run, kept in a JSON file between invocations.
+
+    The file maps the absolute path of each test runner to its exit status when it last ran
+    and the stamps of the files it depended on then: itself and the shared libraries it was linked with.
+    A stamp is the list [ modification time, size, SHA-1 of the content ].
+    The content is hashed again only if the modification time or size has changed,
+    and a file is changed only if its content has, so rebuilding an object to the same content does not select its test runners.
+    '''
+    def __init__(self, fileName, libraries=[]):
+        self.fileName = fileName
+        self.symbolIndex = SymbolIndex(libraries)
+        self.testRunners = self.read()
+        self.added = { }
+        self.stamps = { }
+        return
+
+    def read(self):
+        '''
+        Read the state from the file. A missing or unreadable file is the same as an empty one.
+        '''
+        try:
+            with open(self.fileName, "r") as file:
+                testRunners = json.load(file)
+        except (IOError, ValueError):
+            return { }
+        return dict(map(lambda item: (item[0].encode("utf-8"), self.decodeEntry(item[1])), testRunners.items()))
+
+    def decodeEntry(self, entry):
+        dependencies = dict(map(lambda item: (item[0].encode("utf-8"), [ item[1][0], item[1][1], item[1][2].encode("utf-8") ]), entry["dependencies"].items()))
+        return { "status" : entry["status"], "dependencies" : dependencies }
+
+    def getName(self, testRunner):
+        return os.path.abspath(testRunner)
+
+    def getStamp(self, fileName, previous=None):
+        '''
+        Return the stamp of the named file, reusing the previous stamp if the file's modification time and size are unchanged.
+        Raises OSError if the file does not exist.
+        '''
+        if fileName in self.stamps:
+            return self.stamps[fileName]
+
+        stat = os.stat(fileName)
+        if previous is not None and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+            stamp = previous
+        else:
+            stamp = [ stat.st_mtime, stat.st_size, hashFile(fileName) ]
+        self.stamps[fileName] = stamp
+        return stamp
+
+    def isChanged(self, testRunner):
+        '''
+        Return True if the test runner has not run before, or the content of it or of a library it was linked with has changed since.
+        '''
+        entry = self.testRunners.get(self.getName(testRunner))
+        if entry is None:
+            return True
+        for (fileName, previous) in entry["dependencies"].items():
+            try:
+                if self.getStamp(fileName, previous)[2] != previous[2]:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def hasFailed(self, testRunner):
+        '''
+        Return True if the test runner did not exit with 0 when it last ran, or has not run before.
+        '''
+        entry = self.testRunners.get(self.getName(testRunner))
+        return entry is None or entry["status"] != 0
+
+    def getStatus(self, testRunner):
+        '''
+        Return the exit status of the test runner when it last ran, or None if it has not run before.
+        '''
+        return self.testRunners.get(self.getName(testRunner), { "status" : None })["status"]
+
+    def put(self, testRunner, status):
+        '''
+        Record the exit status of the test runner and the stamps of the files it depends on now.
+        '''
+        name = self.getName(testRunner)
+        previous = self.testRunners.get(name, { "dependencies" : { } })["dependencies"]
+        dependencies = { }
+        for fileName in [ name ] + self.symbolIndex.getDependencies(name):
+            try:
+                dependencies[fileName] = self.getStamp(fileName, previous.get(fileName))
+            except OSError:
+                pass
+        self.testRunners[name] = self.added[name] = { "status" : status, "dependencies" : dependencies }
+        return
+
+    def save(self):
+        '''
+        Save the state to the file, replacing it atomically.
+        The test runners recorded since the file was loaded are merged into the file as it is then,
+        so processes sharing the file do not lose each other's test runners.
+        '''
+        testRunners = self.read()
+        testRunners.update(self.added)
+        self.testRunners = testRunners
+        self.added = { }
+
+        directory = os.path.dirname(os.path.abspath(self.fileName))
+        (fd, temporaryPath) = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as output:
+            json.dump(testRunners, output, indent=1, sort_keys=True)
+        os.rename(temporaryPath, self.fileName)
+        return
@@ -64,18 +64,41 @@ def computeVocabularyScore(tokenCount):
 	return 100.0
 
 
-def csvFunctionResult(file, function):
+def functionRecord(file, function):
+	'''
+	The report record (see LongBow.makeRecord) of the number of tokens in a function.
+	The score is that of the file, as the CSV report has always given it.
+	'''
 	score = computeVocabularyScore(file.token_count)
-	string = "vocabulary,%s,%s,%d,%d,%.2f" % (file.filename, function.name, function.start_line, function.token_count, score)
+	return LongBow.makeRecord("vocabulary", file.filename, "tokenCount", function.token_count, score, function.name,
+				  lineNumber=function.start_line)
 
-	LongBow.scorePrinter([90, 80], score, string)
+
+def fileRecord(file):
+	'''
+	The report record of the average number of tokens in the functions of a file.
+	'''
+	score = computeVocabularyScore(file.token_count)
+	return LongBow.makeRecord("vocabulary", file.filename, "averageTokenCount", file.average_token, score)
+
+
+def averageRecord(fileInformationList):
+	value = computeAverage(fileInformationList)
+	return LongBow.makeRecord("vocabulary", None, "averageTokenCount", value, computeVocabularyScore(value))
+
+
+def csvFunctionResult(file, function):
+	record = functionRecord(file, function)
+	string = "vocabulary,%s,%s,%d,%d,%.2f" % (record["file"], record["function"], record["lineNumber"], record["value"], record["score"])
+
+	LongBow.scorePrinter([90, 80], record["score"], string)
 	return function.token_count
 
 
 def csvFileVocabulary(file):
-	score = computeVocabularyScore(file.token_count)
-	string = "vocabulary,%s,,,%.2f,%.2f" % (file.filename, file.average_token, score)
-	LongBow.scorePrinter([90, 80], score, string)
+	record = fileRecord(file)
+	string = "vocabulary,%s,,,%.2f,%.2f" % (record["file"], record["value"], record["score"])
+	LongBow.scorePrinter([90, 80], record["score"], string)
 	return
 
 
@@ -90,6 +113,17 @@ def csvSummary(fileInformationList):
 	return
 
 
+def jsonFunction(fileInformationList):
+	for fileInformation in fileInformationList:
+		LongBow.printRecords(map(lambda function: functionRecord(fileInformation, function), fileInformation))
+	return
+
+
+def jsonSummary(fileInformationList):
+	LongBow.printRecords(map(lambda file: fileRecord(file), fileInformationList))
+	return
+
+
 def textFunctionResult(file, function, maxFileNameLength, maxFunctionNameLength):
 	score = computeVocabularyScore(function.token_count)
 	format = "%-" + str(maxFileNameLength) + "s %-" + str(maxFunctionNameLength) + "s %3d %3d %6.2f"
@@ -135,11 +169,11 @@ def textFunction(fileInformationList):
 
 def textSummary(fileInformationList, prefix=""):
 	if len(fileInformationList) < 1:
-		print "%sNo Files To Grade" % prefix
+		LongBow.getReportSink().printLine("%sNo Files To Grade" % prefix)
 		return
 	maxFileNameLength = max(map(lambda fileInformation: len(fileInformation.filename), fileInformationList))
 	printFormat = prefix + "%-" + str(maxFileNameLength) + "s %10s %6s"
-	print printFormat % ("File Path", "Ave Token", "Score")
+	LongBow.getReportSink().printLine(printFormat % ("File Path", "Ave Token", "Score"))
 	printFormat = prefix + "%-" + str(maxFileNameLength) + "s %10.2f %6.2f"
 	map(lambda file: textFileVocabulary(file, maxFileNameLength, printFormat), fileInformationList)
 	return
@@ -189,14 +223,21 @@ def commandLineMain(args, hfcca):
 	if args.function:
 		if args.output == "text":
 			textFunction(fileInformationList)
+		elif args.output == "json":
+			jsonFunction(fileInformationList)
 		else:
 			csvFunction(fileInformationList)
 
 	if args.summary:
 		if args.output == "text":
 			textSummary(fileInformationList)
+		elif args.output == "json":
+			jsonSummary(fileInformationList)
 		else:
 			csvSummary(fileInformationList)
 
 	if args.average:
-		print "%.2f" % computeAverage(fileInformationList)
+		if args.output == "json":
+			LongBow.printRecords([averageRecord(fileInformationList)])
+		else:
+			LongBow.getReportSink().printLine("%.2f" % computeAverage(fileInformationList))
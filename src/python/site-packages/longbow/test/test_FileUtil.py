@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import FileUtil
+
+
+SOURCE = '''
+static int
+_parcThing_Helper(int x)
+{
+    return x + 1;
+}
+
+int
+parcThing_Create(int x)
+{
+    return _parcThing_Helper(x);
+}
+'''
+
+
+def isAvailable(command):
+    try:
+        subprocess.call([command, "--version"], stdout=open(os.devnull, "w"), stderr=subprocess.STDOUT)
+    except OSError:
+        return False
+    return True
+
+
+@unittest.skipUnless(isAvailable("cc") and isAvailable("ar"), "requires cc and ar")
+class testGetTestableFunctions(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="test_FileUtil-")
+        os.mkdir(os.path.join(self.directory, "objects"))
+        sourceFileName = os.path.join(self.directory, "parc_Thing.c")
+        with open(sourceFileName, "w") as file:
+            file.write(SOURCE)
+        subprocess.check_call(["cc", "-c", "-o", os.path.join(self.directory, "objects", "parc_Thing.o"), sourceFileName])
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return
+
+    def makeArchive(self, flags):
+        subprocess.check_call(["ar", flags, "libparc.a", os.path.join("objects", "parc_Thing.o")], cwd=self.directory)
+        return os.path.join(self.directory, "libparc.a") + "(parc_Thing.o)"
+
+    def assertTestableFunctions(self, objectFileName):
+        functions = FileUtil.getTestableFunctions(objectFileName)
+        self.assertEqual([ "_parcThing_Helper" ], functions["Local"])
+        self.assertEqual([ "parcThing_Create" ], functions["Global"])
+        return
+
+    def test_ObjectFile(self):
+        self.assertTestableFunctions(os.path.join(self.directory, "objects", "parc_Thing.o"))
+
+    def test_ArchiveMember(self):
+        self.assertTestableFunctions(self.makeArchive("rc"))
+
+    def test_ThinArchiveMember(self):
+        '''
+        A thin archive names its members' object files, relative to the archive, rather than containing them.
+        '''
+        self.assertTestableFunctions(self.makeArchive("rcT"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# Copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in the
+#   documentation and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL XEROX OR PARC BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ################################################################################
+# #
+# # PATENT NOTICE
+# #
+# # This software is distributed under the BSD 2-clause License (see LICENSE
+# # file).  This BSD License does not make any patent claims and as such, does
+# # not act as a patent grant.  The purpose of this section is for each contributor
+# # to define their intentions with respect to intellectual property.
+# #
+# # Each contributor to this source code is encouraged to state their patent
+# # claims and licensing mechanisms for any contributions made. At the end of
+# # this section contributors may each make their own statements.  Contributor's
+# # claims and grants only apply to the pieces (source code, programs, text,
+# # media, etc) that they have contributed directly to this software.
+# #
+# # There is no guarantee that this section is complete, up to date or accurate. It
+# # is up to the contributors to maintain their portion of this section and up to
+# # the user of the software to verify any claims herein.
+# #
+# # Do not remove this header notification.  The contents of this section must be
+# # present in all distributions of the software.  You may only modify your own
+# # intellectual property statements.  Please provide contact information.
+#
+# - Palo Alto Research Center, Inc
+# This software distribution does not grant any rights to patents owned by Palo
+# Alto Research Center, Inc (PARC). Rights to these patents are available via
+# various mechanisms. As of January 2016 PARC has committed to FRAND licensing any
+# intellectual property used by its contributions to this software. You may
+# contact PARC at cipo@parc.com for more information or visit http://www.ccnx.org
+#
+# @author Glenn Scott, Palo Alto Research Center (PARC)
+# @copyright (c) 2015, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC).  All rights reserved.
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import StyleReport
+
+
+# The license header and includes each module of a multi-module file begins with.
+HEADER = [ "/*",
+           " * Copyright (c) 2014, Xerox Corporation (Xerox) and Palo Alto Research Center, Inc (PARC)",
+           " * All rights reserved.",
+           " *",
+           " * Redistribution and use in source and binary forms, with or without",
+           " * modification, are permitted provided that the following conditions are met:",
+           " */",
+           "#include <config.h>",
+           "#include <stdio.h>",
+           "" ]
+
+
+def makeSource(moduleCount, functionCount, misformatted=[]):
+    '''
+    Make the lines of a C source file of moduleCount modules of functionCount functions each,
+    adding a trailing space to each line numbered in misformatted.
+    '''
+    lines = []
+    for module in range(moduleCount):
+        lines.extend(HEADER)
+        for function in range(functionCount):
+            lines.extend([ "int", "module%d_Function%d(int x)" % (module, function), "{", "    if (x > 0) {", "        x++;", "    }", "", "    return x;", "}", "" ])
+    for line in misformatted:
+        lines[line] = lines[line] + " "
+    return "\n".join(lines) + "\n"
+
+
+class testComputeNonCompliantLines(unittest.TestCase):
+    def test_Compliant(self):
+        exemplar = makeSource(1, 3)
+        self.assertEqual(0, StyleReport.computeNonCompliantLines(exemplar, exemplar))
+
+    def test_ChangedLines(self):
+        exemplar = makeSource(1, 3)
+        self.assertEqual(2, StyleReport.computeNonCompliantLines(makeSource(1, 3, [12, 32]), exemplar))
+
+    def test_AddedAndRemovedLines(self):
+        lines = makeSource(1, 3).splitlines()
+        fileData = "\n".join(lines[:12] + [ "/* added */" ] + lines[12:20] + lines[21:]) + "\n"
+        self.assertEqual(2, StyleReport.computeNonCompliantLines(fileData, makeSource(1, 3)))
+
+    def test_ChangedLinesOfLargeFile(self):
+        '''
+        In a file of over 200 lines, braces and blank lines are far more common than 1% of the lines,
+        which must not stop them matching the exemplar, nor leave the repeated headers to be matched to the wrong module.
+        '''
+        exemplar = makeSource(10, 10)
+        lineCount = len(exemplar.splitlines())
+        self.assertTrue(lineCount > 200)
+        for misformatted in [ range(50, lineCount, 97), range(7, lineCount, 113), [ 295, 345, 461, 479, 543, 582, 665, 864, 893, 962 ] ]:
+            self.assertEqual(len(misformatted), StyleReport.computeNonCompliantLines(makeSource(10, 10, misformatted), exemplar))
+
+
+if __name__ == '__main__':
+    unittest.main()